@@ -0,0 +1,706 @@
+# archivo: almacenamiento.py
+import functools
+import itertools
+import json
+import os
+import re
+import tempfile
+import threading
+
+import pandas as pd
+
+from instrumentacion import tramo
+from libro import LibroContable, asignar_ids, codificar_columnar, leer_libro, nuevo_id
+from resumenes import IndiceResumen
+
+# ======= Configuración del diario =======
+# Número de operaciones acumuladas en el diario antes de compactar en segundo plano
+UMBRAL_COMPACTACION = 500
+
+# Bloqueos del diario por archivo, compartidos por todas las instancias del proceso
+# que abren el mismo libro: Streamlit vuelve a ejecutar el script en cada interacción,
+# pero este módulo solo se importa una vez. Cada hogar tiene los suyos, así un hogar
+# que compacta o reconstruye su índice no frena a los demás.
+_bloqueos_archivo = {}
+_bloqueo_registro = threading.Lock()
+
+# umask del proceso, leída una vez al importar (cambiarla para leerla no es seguro entre hilos)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Versiones únicas en el proceso: un almacenamiento reabierto (un hogar que salió de
+# la caché y volvió) nunca repite la versión de otro, ni las claves de caché viejas
+_versiones = itertools.count(1)
+
+
+def bloqueo_archivo(ruta, uso):
+    """Bloqueo del proceso para `uso` sobre el archivo `ruta` (el mismo en cada llamada)"""
+    clave = (os.path.realpath(ruta), uso)
+    with _bloqueo_registro:
+        return _bloqueos_archivo.setdefault(clave, threading.Lock())
+
+
+def datos_vacios():
+    return {"ingresos": [], "gastos": []}
+
+
+def preparar_operacion(operacion):
+    """Los registros nuevos reciben su id antes de escribirse; las ediciones conservan el suyo"""
+    if operacion["op"] == "agregar":
+        operacion["registro"].setdefault("id", nuevo_id())
+    elif operacion["op"] == "agregar_lote":
+        for registros in operacion["registros"].values():
+            for registro in registros:
+                registro.setdefault("id", nuevo_id())
+    elif operacion["op"] == "actualizar" and "id" in operacion:
+        operacion["registro"]["id"] = operacion["id"]
+    # Los registros anteriores los pone el almacenamiento desde lo guardado, no quien llama
+    operacion.pop("anterior", None)
+    operacion.pop("anteriores", None)
+    return operacion
+
+
+def completar_anteriores(operacion, buscar):
+    """
+    Guarda en una edición o eliminación por id los registros que reemplaza, tal
+    como están guardados: `buscar(tipo, ids)` devuelve {id: registro} y se llama
+    con el bloqueo de escritura tomado. KeyError si otra sesión ya borró alguno.
+    """
+    op, tipo = operacion["op"], operacion.get("tipo")
+    if op == "actualizar" and "id" in operacion:
+        ids = [operacion["id"]]
+    elif op == "eliminar" and "ids" in operacion:
+        ids = list(dict.fromkeys(operacion["ids"]))
+    else:
+        return operacion
+    encontrados = buscar(tipo, ids)
+    for id_registro in ids:
+        if id_registro not in encontrados:
+            raise KeyError(f"Registro no encontrado: {id_registro}")
+    if op == "actualizar":
+        operacion["anterior"] = encontrados[ids[0]]
+    else:
+        operacion["anteriores"] = [encontrados[i] for i in ids]
+    return operacion
+
+
+def buscar_en_datos(data):
+    """`buscar` de completar_anteriores sobre un libro ya leído"""
+    def buscar(tipo, ids):
+        ids = set(ids)
+        return {r["id"]: r for r in data[tipo] if r.get("id") in ids}
+    return buscar
+
+
+def _posicion(registros, id_registro):
+    for posicion, registro in enumerate(registros):
+        if registro.get("id") == id_registro:
+            return posicion
+    raise KeyError(f"Registro no encontrado: {id_registro}")
+
+
+def aplicar_operacion(data, operacion):
+    """
+    Aplica una operación del diario sobre los datos en memoria. Las ediciones y
+    eliminaciones guardan en la operación los registros anteriores, que el
+    índice de resúmenes necesita para restar su aporte. Los registros se
+    identifican por id; "indice"/"indices" quedan para diarios anteriores.
+    """
+    op = operacion["op"]
+    if op == "agregar":
+        data[operacion["tipo"]].append(operacion["registro"])
+    elif op == "agregar_lote":
+        # Importaciones: muchos registros de uno o ambos tipos en un solo cambio
+        for tipo, registros in operacion["registros"].items():
+            data[tipo].extend(registros)
+    elif op == "actualizar":
+        registros = data[operacion["tipo"]]
+        if "id" in operacion:
+            # Si otra sesión lo borró, falla en lugar de editar otra fila
+            indice = _posicion(registros, operacion["id"])
+        else:
+            indice = operacion["indice"]
+        operacion.setdefault("anterior", registros[indice])
+        registros[indice] = operacion["registro"]
+    elif op == "eliminar":
+        registros = data[operacion["tipo"]]
+        if "ids" in operacion:
+            ids = set(operacion["ids"])
+            operacion.setdefault("anteriores", [r for r in registros if r.get("id") in ids])
+            data[operacion["tipo"]] = [r for r in registros if r.get("id") not in ids]
+        else:
+            operacion.setdefault("anteriores", [registros[i] for i in operacion["indices"]])
+            for indice in sorted(operacion["indices"], reverse=True):
+                registros.pop(indice)
+    elif op == "eliminar_mes":
+        mes = operacion["mes"]
+        for tipo in operacion["tipos"]:
+            data[tipo] = [r for r in data[tipo] if r["fecha"][:7] != mes]
+    else:
+        raise ValueError(f"Operación desconocida: {op}")
+    return data
+
+
+def _permisos(ruta):
+    """Permisos del archivo actual o, si todavía no existe, los de un archivo nuevo (según la umask)"""
+    try:
+        return os.stat(ruta).st_mode & 0o777
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def escribir_temporal(ruta, contenido, indent=4):
+    """Escribe el contenido junto a `ruta` y devuelve el temporal, listo para renombrar"""
+    # Nombre único: una compactación y una escritura completa pueden coincidir
+    descriptor, temporal = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(ruta)), prefix=f"{os.path.basename(ruta)}.", suffix=".tmp"
+    )
+    # mkstemp crea el temporal con 0600 y os.replace conserva ese modo: sin esto, los
+    # datos de la familia quedarían solo para el dueño después de la primera escritura
+    os.chmod(temporal, _permisos(ruta))
+    with os.fdopen(descriptor, "w") as f:
+        json.dump(contenido, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    return temporal
+
+
+def escribir_json_atomico(ruta, contenido, indent=4):
+    """Escribe el archivo en uno temporal y lo renombra para no dejarlo truncado"""
+    os.replace(escribir_temporal(ruta, contenido, indent), ruta)
+
+
+# ======= Escrituras concurrentes =======
+class ConflictoEscritura(Exception):
+    """Otra sesión cambió los mismos registros o celdas desde que se leyeron"""
+
+    def __init__(self, conflictos):
+        super().__init__(f"Cambios en conflicto: {', '.join(conflictos)}")
+        self.conflictos = conflictos
+
+
+def escritura(metodo):
+    """Las escrituras de un almacenamiento van de a una: el archivo y su versión cambian juntos"""
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        with self._bloqueo_escritura:
+            return metodo(self, *args, **kwargs)
+    return envoltura
+
+
+def fusionar_presupuesto(actual, nuevo, base):
+    """
+    Fusión de tres vías por (mes, categoría): de `nuevo` se toman solo las celdas
+    que cambiaron respecto de `base`; si `actual` también las cambió (a otro
+    valor), son conflicto.
+    """
+    fusion = {mes: dict(categorias) for mes, categorias in actual.items()}
+    conflictos = []
+    for mes in set(nuevo) | set(base):
+        for categoria in set(nuevo.get(mes, {})) | set(base.get(mes, {})):
+            previo = base.get(mes, {}).get(categoria)
+            propio = nuevo.get(mes, {}).get(categoria)
+            if propio == previo:
+                continue
+            ajeno = actual.get(mes, {}).get(categoria)
+            if ajeno not in (previo, propio):
+                conflictos.append(f"{mes}/{categoria}")
+            elif propio is None:
+                fusion.get(mes, {}).pop(categoria, None)
+            else:
+                fusion.setdefault(mes, {})[categoria] = propio
+    if conflictos:
+        raise ConflictoEscritura(sorted(conflictos))
+    return fusion
+
+
+def fusionar_libro(actual, nuevo, base):
+    """
+    Fusión de tres vías por id de registro: se aplican las altas, ediciones y
+    bajas de `nuevo` respecto de `base` sobre `actual`. Un registro que ambos
+    editaron (distinto) o que uno editó y el otro borró es conflicto.
+    """
+    asignar_ids(nuevo)
+    fusion, conflictos = {}, []
+    for tipo in set(actual) | set(nuevo):
+        previos = {r["id"]: r for r in base.get(tipo, [])}
+        propios = {r["id"]: r for r in nuevo.get(tipo, [])}
+        ajenos = {r["id"]: r for r in actual.get(tipo, [])}
+        registros = []
+        for id_registro, registro in ajenos.items():
+            if id_registro in previos and propios.get(id_registro) != previos[id_registro]:
+                if registro not in (previos[id_registro], propios.get(id_registro)):
+                    conflictos.append(f"{tipo}/{id_registro}")
+                elif id_registro in propios:
+                    registros.append(propios[id_registro])
+                continue
+            registros.append(registro)
+        for id_registro, registro in propios.items():
+            if id_registro in previos:
+                if id_registro not in ajenos and registro != previos[id_registro]:
+                    # Editado aquí, borrado por otra sesión
+                    conflictos.append(f"{tipo}/{id_registro}")
+            elif id_registro not in ajenos:
+                registros.append(registro)
+        fusion[tipo] = registros
+    if conflictos:
+        raise ConflictoEscritura(sorted(conflictos))
+    return fusion
+
+
+# ======= Base de los almacenamientos =======
+class Almacenamiento:
+    """
+    Cada almacenamiento lleva versiones en memoria de los datos y del presupuesto.
+    Cambian solo al escribir, así las cachés del dashboard se invalidan sin tocar disco.
+    Las escrituras se serializan con un bloqueo por almacenamiento; las lecturas no
+    lo toman: los archivos se reemplazan completos (o se agregan líneas al diario),
+    así que siempre leen una versión entera.
+    """
+
+    def __init__(self):
+        self.version_datos = next(_versiones)
+        self.version_presupuesto = next(_versiones)
+        # Reentrante: una escritura puede llamar a otra (registrar -> guardar_datos)
+        self._bloqueo_escritura = threading.RLock()
+
+    def _datos_modificados(self):
+        self.version_datos = next(_versiones)
+
+    def _presupuesto_modificado(self):
+        self.version_presupuesto = next(_versiones)
+
+    def cerrar(self):
+        """Libera lo que el almacenamiento tenga abierto (hilos, conexiones) al descartarlo"""
+
+    # ======= Escritura optimista =======
+    # Cada sesión guarda con la versión que leyó. Si otra sesión escribió después,
+    # los cambios se fusionan contra lo leído (`base`) o, sin base, se rechazan.
+    @escritura
+    def guardar_datos_con_version(self, data, version, base=None):
+        if version != self.version_datos:
+            if base is None:
+                raise ConflictoEscritura(["libro"])
+            data = fusionar_libro(self.cargar_datos(), data, base)
+        self.guardar_datos(data)
+        return data
+
+    @escritura
+    def guardar_presupuesto_con_version(self, presupuesto, version, base=None):
+        if version != self.version_presupuesto:
+            if base is None:
+                raise ConflictoEscritura(["presupuesto"])
+            presupuesto = fusionar_presupuesto(self.cargar_presupuesto(), presupuesto, base)
+        self.guardar_presupuesto(presupuesto)
+        return presupuesto
+
+
+# ======= Consultas del dashboard =======
+class ConsultasMemoria:
+    """
+    Consultas por mes: los totales salen del índice de resúmenes y el libro solo
+    se carga cuando se piden los registros individuales.
+    """
+
+    def __init__(self, cargar_datos, indice=None):
+        self._cargar_datos = cargar_datos
+        self._data = None
+        self._indice = indice
+        self._libro = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self._cargar_datos()
+        return self._data
+
+    @property
+    def indice(self):
+        if self._indice is None:
+            self._indice = IndiceResumen.desde_datos(self.data)
+        return self._indice
+
+    @property
+    def libro(self):
+        if self._libro is None:
+            self._libro = LibroContable(self.data)
+        return self._libro
+
+    def registros(self, tipo, mes=None):
+        return self.libro.registros(tipo, mes)
+
+    def registro(self, tipo, id_registro):
+        return self.libro.registro(tipo, id_registro)
+
+    def meses_disponibles(self):
+        return self.indice.meses_disponibles()
+
+    def contar(self, tipo, mes=None):
+        return self.indice.contar(tipo, mes)
+
+    def total_centavos(self, tipo, mes=None):
+        return self.indice.total_centavos(tipo, mes)
+
+    def total(self, tipo, mes=None):
+        return self.indice.total(tipo, mes)
+
+    def totales_por_mes(self):
+        return self.indice.totales_por_mes()
+
+    def gastos_por(self, columnas, mes=None):
+        """Suma de gastos agrupada por las columnas indicadas"""
+        return self.indice.gastos_por(columnas, mes)
+
+
+class ConsultasEnCache:
+    """
+    Memoriza los resultados de otro objeto de consultas. Se crea uno por versión
+    de los datos, por lo que nunca devuelve resultados de una versión anterior.
+    """
+
+    def __init__(self, consultas):
+        self._consultas = consultas
+        self._resultados = {}
+
+    def __getattr__(self, nombre):
+        metodo = getattr(self._consultas, nombre)
+
+        def consulta(*args):
+            clave = (nombre,) + tuple(tuple(a) if isinstance(a, list) else a for a in args)
+            if clave not in self._resultados:
+                self._resultados[clave] = metodo(*args)
+            resultado = self._resultados[clave]
+            # Los resultados se comparten entre sesiones: cada llamada recibe una copia
+            # superficial (barata), así renombrar o agregar columnas no altera la caché
+            if isinstance(resultado, pd.DataFrame):
+                return resultado.copy(deep=False)
+            return dict(resultado) if isinstance(resultado, dict) else resultado
+
+        return consulta
+
+
+# ======= Almacenamiento JSON (archivo completo) =======
+class AlmacenamientoJSON(Almacenamiento):
+    """
+    Guarda todo el libro en un solo archivo JSON que se reescribe en cada cambio.
+    El archivo va por columnas (ver libro.codificar_columnar); los archivos
+    anteriores, con un objeto por registro, se siguen leyendo.
+    """
+
+    def __init__(self, data_file, budget_file):
+        super().__init__()
+        self.data_file = data_file
+        self.budget_file = budget_file
+
+    def _leer_archivo(self):
+        if os.path.exists(self.data_file):
+            with tramo("json: parsear libro"), open(self.data_file, "r") as f:
+                return json.load(f)
+        return datos_vacios()
+
+    def _leer_libro(self):
+        contenido = self._leer_archivo()
+        with tramo("json: decodificar libro"):
+            return leer_libro(contenido)
+
+    def cargar_datos(self):
+        data = self._leer_libro()
+        if asignar_ids(data):
+            # Libro anterior a los ids: se guardan una vez para que no cambien
+            self.guardar_datos(data)
+        return data
+
+    @escritura
+    def guardar_datos(self, data):
+        asignar_ids(data)
+        escribir_json_atomico(self.data_file, codificar_columnar(data), indent=None)
+        self._datos_modificados()
+
+    @escritura
+    def registrar(self, operacion, data=None):
+        preparar_operacion(operacion)
+        # Sobre lo guardado, no sobre la copia de la sesión, que puede haber quedado atrás
+        actual = self._leer_libro()
+        asignar_ids(actual)
+        completar_anteriores(operacion, buscar_en_datos(actual))
+        aplicar_operacion(actual, operacion)
+        self.guardar_datos(actual)
+        if data is not None:
+            aplicar_operacion(data, operacion)
+
+    def consultas(self):
+        # Sin diario no hay una marca para validar un índice guardado: se arma del libro
+        return ConsultasMemoria(self.cargar_datos)
+
+    def cargar_presupuesto(self):
+        if os.path.exists(self.budget_file):
+            with open(self.budget_file, "r") as f:
+                return json.load(f)
+        return {}
+
+    @escritura
+    def guardar_presupuesto(self, presupuesto):
+        escribir_json_atomico(self.budget_file, presupuesto)
+        self._presupuesto_modificado()
+
+
+# ======= Almacenamiento con diario (snapshot + JSON lines) =======
+def _secuencia_final(ruta):
+    """Secuencia de la última operación completa del diario, leyendo solo la cola"""
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        lineas = f.read().splitlines()
+    for linea in reversed(lineas):
+        try:
+            return json.loads(linea)["seq"]
+        except (json.JSONDecodeError, KeyError, UnicodeDecodeError):
+            continue
+    return None
+
+
+def _secuencia_snapshot(ruta):
+    """El snapshot escribe "_secuencia" como primera clave: basta leer el encabezado"""
+    if not os.path.exists(ruta):
+        return 0
+    with open(ruta, "r") as f:
+        encabezado = f.read(128)
+    coincidencia = re.search(r'"_secuencia":\s*(\d+)', encabezado)
+    return int(coincidencia.group(1)) if coincidencia else 0
+
+
+class AlmacenamientoDiario(AlmacenamientoJSON):
+    """
+    Cada cambio se agrega como una línea al diario (JSON lines), así el costo de
+    escritura no depende del tamaño del libro. El archivo de datos actúa como
+    snapshot y se compacta en segundo plano cuando el diario crece. El índice de
+    resúmenes se guarda junto al snapshot y se pone al día con la cola del diario.
+    """
+
+    def __init__(self, data_file, budget_file, umbral_compactacion=UMBRAL_COMPACTACION):
+        super().__init__(data_file, budget_file)
+        base, _ = os.path.splitext(data_file)
+        self.diario_file = f"{base}.jsonl"
+        self.rotado_file = f"{self.diario_file}.compactando"
+        self.resumen_file = f"{base}.resumen.json"
+        self.umbral_compactacion = umbral_compactacion
+        self._indice = None
+        self._bloqueo_diario = bloqueo_archivo(self.diario_file, "diario")
+        self._bloqueo_compactacion = bloqueo_archivo(self.diario_file, "compactacion")
+
+    def _leer_snapshot(self):
+        contenido = self._leer_archivo()
+        secuencia = contenido.pop("_secuencia", 0)
+        return leer_libro(contenido), secuencia
+
+    def _preparar_snapshot(self, data, secuencia):
+        """Escribe snapshot e índice en temporales; devuelve los pares (temporal, destino)"""
+        indice = IndiceResumen.desde_datos(data).a_json(secuencia)
+        return [
+            (escribir_temporal(self.data_file, {"_secuencia": secuencia, **codificar_columnar(data)}, indent=None),
+             self.data_file),
+            (escribir_temporal(self.resumen_file, indice, indent=None), self.resumen_file),
+        ]
+
+    def _ultima_secuencia(self):
+        for ruta in (self.diario_file, self.rotado_file):
+            ultima = _secuencia_final(ruta)
+            if ultima is not None:
+                return ultima
+        return _secuencia_snapshot(self.data_file)
+
+    def _operaciones(self, rutas, desde):
+        """Operaciones de los diarios indicados con secuencia mayor a `desde`"""
+        for ruta in rutas:
+            if not os.path.exists(ruta):
+                continue
+            with open(ruta, "r") as f:
+                for linea in f:
+                    try:
+                        operacion = json.loads(linea)
+                    except json.JSONDecodeError:
+                        # Última línea incompleta por una caída a mitad de escritura
+                        break
+                    if operacion["seq"] > desde:
+                        desde = operacion["seq"]
+                        yield operacion
+
+    def _reproducir(self, data, rutas, desde):
+        ultima = desde
+        for operacion in self._operaciones(rutas, desde):
+            try:
+                aplicar_operacion(data, operacion)
+            except KeyError:
+                # Edición de un registro que otra sesión ya había borrado
+                pass
+            ultima = operacion["seq"]
+        return ultima
+
+    def _leer_libro(self):
+        data, secuencia = self._leer_snapshot()
+        with tramo("diario: reproducir operaciones"):
+            self._reproducir(data, (self.rotado_file, self.diario_file), secuencia)
+        return data
+
+    def _cargar_indice(self):
+        """Índice guardado más la cola del diario; si falta algún cambio, se reconstruye"""
+        if os.path.exists(self.resumen_file):
+            with open(self.resumen_file, "r") as f:
+                contenido = json.load(f)
+            try:
+                indice, marca = IndiceResumen.desde_json(contenido), contenido["marca"]
+                for operacion in self._operaciones((self.rotado_file, self.diario_file), marca):
+                    if operacion["seq"] != marca + 1:
+                        raise ValueError("Faltan operaciones entre el índice y el diario")
+                    indice.aplicar(operacion)
+                    marca = operacion["seq"]
+                if marca >= _secuencia_snapshot(self.data_file):
+                    return indice
+            except ValueError:
+                pass
+        # Sin migrar ids: este método corre con el bloqueo del diario tomado
+        data = self._leer_libro()
+        indice = IndiceResumen.desde_datos(data)
+        escribir_json_atomico(self.resumen_file, indice.a_json(self._ultima_secuencia()), indent=None)
+        return indice
+
+    def indice_resumen(self):
+        """Copia del índice de resúmenes al día (se carga una vez por proceso)"""
+        with self._bloqueo_diario:
+            if self._indice is None:
+                self._indice = self._cargar_indice()
+            return self._indice.copia()
+
+    def consultas(self):
+        return ConsultasMemoria(self.cargar_datos, self.indice_resumen())
+
+    @escritura
+    def guardar_datos(self, data):
+        """Escritura completa: nuevo snapshot y diario vacío"""
+        asignar_ids(data)
+        with self._bloqueo_diario:
+            for temporal, destino in self._preparar_snapshot(data, self._ultima_secuencia()):
+                os.replace(temporal, destino)
+            for ruta in (self.diario_file, self.rotado_file):
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+            self._indice = None
+        self._datos_modificados()
+
+    @escritura
+    def registrar(self, operacion, data=None):
+        preparar_operacion(operacion)
+        with self._bloqueo_diario:
+            if operacion["op"] in ("actualizar", "eliminar"):
+                # Los anteriores salen del libro guardado: la copia de la sesión puede haber quedado atrás
+                completar_anteriores(operacion, buscar_en_datos(self._leer_libro()))
+            # La secuencia se toma del disco: varias sesiones comparten el diario
+            secuencia = self._ultima_secuencia() + 1
+            linea = json.dumps({"seq": secuencia, **operacion})
+            with open(self.diario_file, "a") as f:
+                f.write(linea + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            pendientes = secuencia - _secuencia_snapshot(self.data_file)
+            if operacion["op"] == "agregar_lote":
+                # Un lote grande pesa como muchas operaciones al reproducir el diario
+                pendientes += sum(len(r) for r in operacion["registros"].values())
+            if self._indice is not None:
+                try:
+                    self._indice.aplicar(operacion)
+                except ValueError:
+                    # Sin el registro anterior no hay delta: se reconstruye al consultar
+                    self._indice = None
+        self._datos_modificados()
+        if data is not None:
+            aplicar_operacion(data, operacion)
+        if pendientes >= self.umbral_compactacion:
+            self.compactar_en_segundo_plano()
+
+    def compactar_en_segundo_plano(self):
+        if not self._bloqueo_compactacion.acquire(blocking=False):
+            return None
+        try:
+            with self._bloqueo_diario:
+                # Rotar el diario: las nuevas operaciones van a un archivo nuevo
+                if not os.path.exists(self.rotado_file) and os.path.exists(self.diario_file):
+                    os.replace(self.diario_file, self.rotado_file)
+        except Exception:
+            self._bloqueo_compactacion.release()
+            raise
+        hilo = threading.Thread(target=self._compactar, daemon=True)
+        hilo.start()
+        return hilo
+
+    def _compactar(self):
+        try:
+            if not os.path.exists(self.rotado_file):
+                return
+            data, secuencia = self._leer_snapshot()
+            secuencia = self._reproducir(data, (self.rotado_file,), secuencia)
+            # Lo costoso (serializar) ocurre fuera del bloqueo; dentro solo se renombra
+            archivos = self._preparar_snapshot(data, secuencia)
+            with self._bloqueo_diario:
+                # Una escritura completa pudo reemplazar el snapshot mientras tanto
+                if os.path.exists(self.rotado_file):
+                    for temporal, destino in archivos:
+                        os.replace(temporal, destino)
+                    os.remove(self.rotado_file)
+                else:
+                    for temporal, _ in archivos:
+                        os.remove(temporal)
+        finally:
+            self._bloqueo_compactacion.release()
+
+
+MODOS_ALMACENAMIENTO = {
+    "json": AlmacenamientoJSON,
+    "diario": AlmacenamientoDiario,
+}
+
+
+def cargar_libro(modo, data_file, budget_file):
+    """
+    (datos, presupuesto) de un libro sin modificar nada en disco, para reportes por
+    lotes: no persiste ids ni índices de resúmenes, no migra ni importa archivos.
+    Los registros sin id reciben uno solo en memoria.
+    """
+    if modo == "sqlite":
+        from almacenamiento_sqlite import leer_base
+        data, presupuesto = leer_base(data_file, budget_file)
+    elif modo == "particionado":
+        from almacenamiento_particionado import leer_particiones
+        data, presupuesto = leer_particiones(data_file, budget_file)
+    elif modo in MODOS_ALMACENAMIENTO:
+        almacen = MODOS_ALMACENAMIENTO[modo](data_file, budget_file)
+        data, presupuesto = almacen._leer_libro(), almacen.cargar_presupuesto()
+    else:
+        raise ValueError(f"Modo sin lectura de archivos locales: {modo}")
+    asignar_ids(data)
+    return data, presupuesto
+
+
+def crear_almacenamiento(modo, data_file, budget_file, url=None, motor=None, esquema=None):
+    """`esquema` separa en la base SQL las tablas de cada hogar (modos sql y sincronizado)"""
+    if modo == "sql":
+        from almacenamiento_sql import AlmacenamientoSQL
+        return AlmacenamientoSQL(data_file, budget_file, url=url, motor=motor, esquema=esquema)
+    if modo == "sincronizado":
+        from almacenamiento_sql import AlmacenamientoSQL
+        from sincronizacion import AlmacenamientoSincronizado
+
+        def crear_remoto():
+            # Sin importar los JSON: el libro local llega por la cola
+            return AlmacenamientoSQL(data_file, budget_file, url=url, motor=motor, importar_json=False, esquema=esquema)
+        return AlmacenamientoSincronizado(data_file, budget_file, crear_remoto)
+    if modo == "sqlite":
+        from almacenamiento_sqlite import AlmacenamientoSQLite
+        return AlmacenamientoSQLite(data_file, budget_file)
+    if modo == "particionado":
+        from almacenamiento_particionado import AlmacenamientoParticionado
+        return AlmacenamientoParticionado(data_file, budget_file)
+    if modo not in MODOS_ALMACENAMIENTO:
+        raise ValueError(f"Modo de almacenamiento desconocido: {modo}")
+    return MODOS_ALMACENAMIENTO[modo](data_file, budget_file)
@@ -0,0 +1,212 @@
+# archivo: almacenamiento_particionado.py
+import json
+import os
+
+from almacenamiento import (
+    AlmacenamientoDiario,
+    AlmacenamientoJSON,
+    ConsultasMemoria,
+    aplicar_operacion,
+    bloqueo_archivo,
+    completar_anteriores,
+    datos_vacios,
+    escribir_json_atomico,
+    escritura,
+    preparar_operacion,
+)
+from libro import LibroContable, asignar_ids, codificar_columnar, leer_libro
+from resumenes import IndiceResumen
+
+
+def _mes(registro):
+    return registro["fecha"][:7]
+
+
+# ======= Consultas por partición =======
+class ConsultasParticionadas(ConsultasMemoria):
+    """
+    Los totales salen del resumen del manifiesto y los registros de un mes se
+    leen solo de su partición; el libro completo se carga únicamente sin mes.
+    """
+
+    def __init__(self, almacen, indice):
+        super().__init__(almacen.cargar_datos, indice)
+        self._almacen = almacen
+        self._particiones = {}
+
+    def registros(self, tipo, mes=None):
+        if mes is None:
+            return super().registros(tipo)
+        if mes not in self._particiones:
+            self._particiones[mes] = LibroContable(self._almacen.cargar_particion(mes))
+        return self._particiones[mes].frame(tipo)
+
+
+def directorio_particiones(data_file):
+    return f"{os.path.splitext(data_file)[0]}_meses"
+
+
+def _leer_particion(ruta):
+    if not os.path.exists(ruta):
+        return datos_vacios()
+    with open(ruta, "r") as f:
+        return leer_libro(json.load(f))
+
+
+def leer_particiones(data_file, budget_file):
+    """
+    (datos, presupuesto) sin escribir nada: si todavía no hay manifiesto, se leen
+    el libro JSON y su diario, que es lo que importaría la primera apertura.
+    """
+    directorio = directorio_particiones(data_file)
+    manifiesto_file = os.path.join(directorio, "manifiesto.json")
+    if not os.path.exists(manifiesto_file):
+        origen = AlmacenamientoDiario(data_file, budget_file)
+        return origen._leer_libro(), origen.cargar_presupuesto()
+    with open(manifiesto_file, "r") as f:
+        meses = json.load(f)["particiones"]
+    data = datos_vacios()
+    for mes in meses:
+        particion = _leer_particion(os.path.join(directorio, f"{mes}.json"))
+        for tipo in data:
+            data[tipo].extend(particion[tipo])
+    return data, AlmacenamientoJSON(data_file, budget_file).cargar_presupuesto()
+
+
+# ======= Almacenamiento particionado por mes =======
+class AlmacenamientoParticionado(AlmacenamientoJSON):
+    """
+    Un archivo columnar por mes (AAAA-MM.json) más un manifiesto con la lista de
+    particiones y sus resúmenes. Cada cambio reescribe solo los meses que toca y
+    eliminar un mes completo es borrar su archivo. El presupuesto sigue en JSON.
+    """
+
+    def __init__(self, data_file, budget_file):
+        super().__init__(data_file, budget_file)
+        self.directorio = directorio_particiones(data_file)
+        # Uno por directorio: cada hogar escribe sus particiones sin esperar a los demás
+        self._bloqueo = bloqueo_archivo(self.directorio, "particiones")
+        self.manifiesto_file = os.path.join(self.directorio, "manifiesto.json")
+        if not os.path.exists(self.manifiesto_file):
+            os.makedirs(self.directorio, exist_ok=True)
+            # Primera apertura: se importan el libro JSON y su diario, si existen, sin
+            # modificarlos (a un libro sin ids se le asignan solo en memoria)
+            data = AlmacenamientoDiario(data_file, budget_file)._leer_libro()
+            asignar_ids(data)
+            self.guardar_datos(data)
+
+    def _particion_file(self, mes):
+        return os.path.join(self.directorio, f"{mes}.json")
+
+    def _leer_manifiesto(self):
+        with open(self.manifiesto_file, "r") as f:
+            return json.load(f)
+
+    def _escribir_manifiesto(self, indice):
+        escribir_json_atomico(
+            self.manifiesto_file,
+            {"particiones": indice.meses_disponibles(), "resumen": indice.a_json(None)},
+            indent=None,
+        )
+
+    def _escribir_particion(self, mes, data):
+        if data["ingresos"] or data["gastos"]:
+            escribir_json_atomico(self._particion_file(mes), codificar_columnar(data), indent=None)
+        elif os.path.exists(self._particion_file(mes)):
+            os.remove(self._particion_file(mes))
+
+    def cargar_particion(self, mes):
+        return _leer_particion(self._particion_file(mes))
+
+    def meses_disponibles(self):
+        """Meses con datos según el manifiesto, sin leer ninguna partición"""
+        return self._leer_manifiesto()["particiones"]
+
+    def _leer_libro(self):
+        data = datos_vacios()
+        for mes in self.meses_disponibles():
+            particion = self.cargar_particion(mes)
+            for tipo in data:
+                data[tipo].extend(particion[tipo])
+        return data
+
+    @escritura
+    def guardar_datos(self, data):
+        """Escritura completa: una partición por mes y un manifiesto nuevo"""
+        asignar_ids(data)
+        particiones = {}
+        for tipo in ("ingresos", "gastos"):
+            for registro in data.get(tipo, []):
+                particiones.setdefault(_mes(registro), datos_vacios())[tipo].append(registro)
+        with self._bloqueo:
+            for mes, particion in particiones.items():
+                self._escribir_particion(mes, particion)
+            for archivo in os.listdir(self.directorio):
+                mes, extension = os.path.splitext(archivo)
+                if extension == ".json" and archivo != "manifiesto.json" and mes not in particiones:
+                    os.remove(os.path.join(self.directorio, archivo))
+            self._escribir_manifiesto(IndiceResumen.desde_datos(data))
+        self._datos_modificados()
+
+    def _buscar(self, tipo, ids):
+        """Registros por id recorriendo las particiones hasta encontrarlos todos"""
+        pendientes, encontrados = set(ids), {}
+        for mes in self.meses_disponibles():
+            for registro in self.cargar_particion(mes)[tipo]:
+                if registro["id"] in pendientes:
+                    encontrados[registro["id"]] = registro
+                    pendientes.discard(registro["id"])
+            if not pendientes:
+                break
+        return encontrados
+
+    @escritura
+    def registrar(self, operacion, data=None):
+        preparar_operacion(operacion)
+        op, tipo = operacion["op"], operacion.get("tipo")
+        with self._bloqueo:
+            modificadas = {}
+
+            def particion(mes):
+                if mes not in modificadas:
+                    modificadas[mes] = self.cargar_particion(mes)
+                return modificadas[mes]
+
+            if op == "agregar":
+                particion(_mes(operacion["registro"]))[tipo].append(operacion["registro"])
+            elif op == "agregar_lote":
+                for tipo_lote, registros in operacion["registros"].items():
+                    for registro in registros:
+                        particion(_mes(registro))[tipo_lote].append(registro)
+            elif op == "actualizar":
+                # Con el bloqueo tomado: si otra sesión lo borró, KeyError y no se edita otra fila
+                completar_anteriores(operacion, self._buscar)
+                origen = particion(_mes(operacion["anterior"]))[tipo]
+                origen[:] = [r for r in origen if r["id"] != operacion["id"]]
+                particion(_mes(operacion["registro"]))[tipo].append(operacion["registro"])
+            elif op == "eliminar":
+                completar_anteriores(operacion, self._buscar)
+                ids = set(operacion["ids"])
+                for mes in {_mes(r) for r in operacion["anteriores"]}:
+                    particion(mes)[tipo] = [r for r in particion(mes)[tipo] if r["id"] not in ids]
+            elif op == "eliminar_mes":
+                if set(operacion["tipos"]) >= {"ingresos", "gastos"}:
+                    # Mes completo: se borra la partición sin leerla
+                    modificadas[operacion["mes"]] = datos_vacios()
+                else:
+                    for t in operacion["tipos"]:
+                        particion(operacion["mes"])[t] = []
+            else:
+                raise ValueError(f"Operación desconocida: {op}")
+
+            for mes, contenido in modificadas.items():
+                self._escribir_particion(mes, contenido)
+            indice = IndiceResumen.desde_json(self._leer_manifiesto()["resumen"])
+            indice.aplicar(operacion)
+            self._escribir_manifiesto(indice)
+        self._datos_modificados()
+        if data is not None:
+            aplicar_operacion(data, operacion)
+
+    def consultas(self):
+        return ConsultasParticionadas(self, IndiceResumen.desde_json(self._leer_manifiesto()["resumen"]))
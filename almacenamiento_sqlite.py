@@ -0,0 +1,458 @@
+# archivo: almacenamiento_sqlite.py
+import argparse
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+import pandas as pd
+
+from almacenamiento import (
+    Almacenamiento,
+    AlmacenamientoDiario,
+    aplicar_operacion,
+    completar_anteriores,
+    datos_vacios,
+    escritura,
+    preparar_operacion,
+)
+from libro import COLUMNAS, a_centavos, a_monto, asignar_ids, tipar_registros
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ingresos (
+    id INTEGER PRIMARY KEY,
+    uid TEXT NOT NULL,
+    centavos INTEGER NOT NULL,
+    descripcion TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    mes TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS gastos (
+    id INTEGER PRIMARY KEY,
+    uid TEXT NOT NULL,
+    centavos INTEGER NOT NULL,
+    descripcion TEXT NOT NULL,
+    categoria TEXT,
+    subcategoria TEXT,
+    medio_pago TEXT,
+    fecha TEXT NOT NULL,
+    mes TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS presupuesto (
+    mes TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    monto REAL NOT NULL,
+    PRIMARY KEY (mes, categoria)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ingresos_uid ON ingresos (uid);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_gastos_uid ON gastos (uid);
+CREATE INDEX IF NOT EXISTS idx_ingresos_fecha ON ingresos (fecha);
+CREATE INDEX IF NOT EXISTS idx_ingresos_mes ON ingresos (mes);
+CREATE INDEX IF NOT EXISTS idx_gastos_fecha ON gastos (fecha);
+CREATE INDEX IF NOT EXISTS idx_gastos_mes_categoria ON gastos (mes, categoria, subcategoria);
+CREATE INDEX IF NOT EXISTS idx_gastos_medio_pago ON gastos (medio_pago);
+"""
+
+# Resúmenes materializados por mes × categoría × subcategoría × medio de pago,
+# en centavos enteros como el libro. Los triggers los mantienen con deltas en
+# cada INSERT/UPDATE/DELETE; las dimensiones vacías se guardan como '' para que
+# la clave primaria funcione.
+ESQUEMA_RESUMENES = """
+CREATE TABLE IF NOT EXISTS resumen_ingresos (
+    mes TEXT PRIMARY KEY,
+    centavos INTEGER NOT NULL,
+    cantidad INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS resumen_gastos (
+    mes TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    subcategoria TEXT NOT NULL,
+    medio_pago TEXT NOT NULL,
+    centavos INTEGER NOT NULL,
+    cantidad INTEGER NOT NULL,
+    PRIMARY KEY (mes, categoria, subcategoria, medio_pago)
+);
+
+CREATE TRIGGER IF NOT EXISTS resumen_ingresos_insert AFTER INSERT ON ingresos BEGIN
+    INSERT INTO resumen_ingresos (mes, centavos, cantidad) VALUES (NEW.mes, NEW.centavos, 1)
+    ON CONFLICT (mes) DO UPDATE SET centavos = centavos + excluded.centavos, cantidad = cantidad + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS resumen_ingresos_delete AFTER DELETE ON ingresos BEGIN
+    UPDATE resumen_ingresos SET centavos = centavos - OLD.centavos, cantidad = cantidad - 1 WHERE mes = OLD.mes;
+    DELETE FROM resumen_ingresos WHERE mes = OLD.mes AND cantidad = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS resumen_ingresos_update AFTER UPDATE ON ingresos BEGIN
+    UPDATE resumen_ingresos SET centavos = centavos - OLD.centavos, cantidad = cantidad - 1 WHERE mes = OLD.mes;
+    DELETE FROM resumen_ingresos WHERE mes = OLD.mes AND cantidad = 0;
+    INSERT INTO resumen_ingresos (mes, centavos, cantidad) VALUES (NEW.mes, NEW.centavos, 1)
+    ON CONFLICT (mes) DO UPDATE SET centavos = centavos + excluded.centavos, cantidad = cantidad + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS resumen_gastos_insert AFTER INSERT ON gastos BEGIN
+    INSERT INTO resumen_gastos (mes, categoria, subcategoria, medio_pago, centavos, cantidad)
+    VALUES (NEW.mes, IFNULL(NEW.categoria, ''), IFNULL(NEW.subcategoria, ''), IFNULL(NEW.medio_pago, ''), NEW.centavos, 1)
+    ON CONFLICT (mes, categoria, subcategoria, medio_pago)
+    DO UPDATE SET centavos = centavos + excluded.centavos, cantidad = cantidad + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS resumen_gastos_delete AFTER DELETE ON gastos BEGIN
+    UPDATE resumen_gastos SET centavos = centavos - OLD.centavos, cantidad = cantidad - 1
+    WHERE mes = OLD.mes AND categoria = IFNULL(OLD.categoria, '')
+      AND subcategoria = IFNULL(OLD.subcategoria, '') AND medio_pago = IFNULL(OLD.medio_pago, '');
+    DELETE FROM resumen_gastos WHERE mes = OLD.mes AND cantidad = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS resumen_gastos_update AFTER UPDATE ON gastos BEGIN
+    UPDATE resumen_gastos SET centavos = centavos - OLD.centavos, cantidad = cantidad - 1
+    WHERE mes = OLD.mes AND categoria = IFNULL(OLD.categoria, '')
+      AND subcategoria = IFNULL(OLD.subcategoria, '') AND medio_pago = IFNULL(OLD.medio_pago, '');
+    DELETE FROM resumen_gastos WHERE mes = OLD.mes AND cantidad = 0;
+    INSERT INTO resumen_gastos (mes, categoria, subcategoria, medio_pago, centavos, cantidad)
+    VALUES (NEW.mes, IFNULL(NEW.categoria, ''), IFNULL(NEW.subcategoria, ''), IFNULL(NEW.medio_pago, ''), NEW.centavos, 1)
+    ON CONFLICT (mes, categoria, subcategoria, medio_pago)
+    DO UPDATE SET centavos = centavos + excluded.centavos, cantidad = cantidad + 1;
+END;
+"""
+
+RECONSTRUIR_RESUMENES = """
+DELETE FROM resumen_ingresos;
+DELETE FROM resumen_gastos;
+INSERT INTO resumen_ingresos (mes, centavos, cantidad)
+    SELECT mes, SUM(centavos), COUNT(*) FROM ingresos GROUP BY mes;
+INSERT INTO resumen_gastos (mes, categoria, subcategoria, medio_pago, centavos, cantidad)
+    SELECT mes, IFNULL(categoria, ''), IFNULL(subcategoria, ''), IFNULL(medio_pago, ''), SUM(centavos), COUNT(*)
+    FROM gastos GROUP BY 1, 2, 3, 4;
+"""
+
+# Bases con montos REAL: se apartan las tablas viejas (con sus índices y
+# resúmenes) para crear el esquema en centavos y copiar los registros
+APARTAR_MONTOS_DECIMALES = """
+DROP TRIGGER IF EXISTS resumen_ingresos_insert;
+DROP TRIGGER IF EXISTS resumen_ingresos_delete;
+DROP TRIGGER IF EXISTS resumen_ingresos_update;
+DROP TRIGGER IF EXISTS resumen_gastos_insert;
+DROP TRIGGER IF EXISTS resumen_gastos_delete;
+DROP TRIGGER IF EXISTS resumen_gastos_update;
+DROP TABLE IF EXISTS resumen_ingresos;
+DROP TABLE IF EXISTS resumen_gastos;
+DROP INDEX IF EXISTS idx_ingresos_fecha;
+DROP INDEX IF EXISTS idx_ingresos_mes;
+DROP INDEX IF EXISTS idx_gastos_fecha;
+DROP INDEX IF EXISTS idx_gastos_mes_categoria;
+DROP INDEX IF EXISTS idx_gastos_medio_pago;
+ALTER TABLE ingresos RENAME TO ingresos_decimal;
+ALTER TABLE gastos RENAME TO gastos_decimal;
+"""
+
+COPIAR_A_CENTAVOS = """
+INSERT INTO ingresos (id, uid, centavos, descripcion, fecha, mes)
+    SELECT id, lower(hex(randomblob(16))), CAST(ROUND(monto * 100) AS INTEGER), descripcion, fecha, mes
+    FROM ingresos_decimal;
+INSERT INTO gastos (id, uid, centavos, descripcion, categoria, subcategoria, medio_pago, fecha, mes)
+    SELECT id, lower(hex(randomblob(16))), CAST(ROUND(monto * 100) AS INTEGER), descripcion,
+           categoria, subcategoria, medio_pago, fecha, mes
+    FROM gastos_decimal;
+DROP TABLE ingresos_decimal;
+DROP TABLE gastos_decimal;
+"""
+
+# Bases sin ids estables: cada registro recibe uno al azar, con el mismo formato que libro.nuevo_id
+AGREGAR_UIDS = """
+ALTER TABLE ingresos ADD COLUMN uid TEXT NOT NULL DEFAULT '';
+ALTER TABLE gastos ADD COLUMN uid TEXT NOT NULL DEFAULT '';
+UPDATE ingresos SET uid = lower(hex(randomblob(16)));
+UPDATE gastos SET uid = lower(hex(randomblob(16)));
+"""
+
+# Versión del esquema guardada en PRAGMA user_version (2: montos en centavos, 3: ids estables)
+VERSION_ESQUEMA = 3
+
+# Columnas de cada tabla: el monto se guarda en centavos y el id del registro en `uid`
+# (`id` es el rowid de SQLite)
+COLUMNAS_SQL = {
+    tipo: [{"monto": "centavos", "id": "uid"}.get(c, c) for c in columnas] for tipo, columnas in COLUMNAS.items()
+}
+
+# Columnas por las que el dashboard puede agrupar gastos
+COLUMNAS_AGRUPABLES = {"mes", "categoria", "subcategoria", "medio_pago"}
+
+
+def _fila(tipo, registro):
+    valores = tuple(a_centavos(registro["monto"]) if c == "monto" else registro.get(c) for c in COLUMNAS[tipo])
+    return valores + (registro["fecha"][:7],)
+
+
+def _registro(tipo, fila):
+    registro = dict(zip(COLUMNAS[tipo], fila))
+    registro["monto"] = a_monto(registro["monto"])
+    return registro
+
+
+def _insertar(conexion, tipo, registros):
+    columnas = COLUMNAS_SQL[tipo] + ["mes"]
+    marcadores = ", ".join("?" for _ in columnas)
+    conexion.executemany(
+        f"INSERT INTO {tipo} ({', '.join(columnas)}) VALUES ({marcadores})",
+        [_fila(tipo, r) for r in registros],
+    )
+
+
+# ======= Consultas indexadas =======
+class ConsultasSQLite:
+    """
+    Mismas consultas que ConsultasMemoria: los totales salen de las tablas de
+    resúmenes y los registros individuales de las tablas indexadas por mes.
+    Se comparten entre sesiones: cada consulta abre y cierra su propia conexión
+    de lectura (`lectura()`), nunca usa la de escritura.
+    """
+
+    def __init__(self, lectura):
+        self._lectura = lectura
+
+    def _filtro(self, mes):
+        return (" WHERE mes = ?", (mes,)) if mes is not None else ("", ())
+
+    def meses_disponibles(self):
+        with self._lectura() as conexion:
+            filas = conexion.execute(
+                "SELECT mes FROM resumen_ingresos UNION SELECT mes FROM resumen_gastos ORDER BY mes"
+            ).fetchall()
+        return [f[0] for f in filas]
+
+    def registros(self, tipo, mes=None):
+        where, params = self._filtro(mes)
+        columnas = ", ".join("uid AS id" if c == "uid" else c for c in COLUMNAS_SQL[tipo])
+        with self._lectura() as conexion:
+            df = pd.read_sql_query(f"SELECT {columnas} FROM {tipo}{where} ORDER BY {tipo}.id", conexion, params=params)
+        return tipar_registros(df, tipo)
+
+    def registro(self, tipo, id_registro):
+        with self._lectura() as conexion:
+            fila = conexion.execute(
+                f"SELECT {', '.join(COLUMNAS_SQL[tipo])} FROM {tipo} WHERE uid = ?", (id_registro,)
+            ).fetchone()
+        return _registro(tipo, fila) if fila is not None else None
+
+    def contar(self, tipo, mes=None):
+        where, params = self._filtro(mes)
+        with self._lectura() as conexion:
+            fila = conexion.execute(f"SELECT COALESCE(SUM(cantidad), 0) FROM resumen_{tipo}{where}", params).fetchone()
+        return fila[0]
+
+    def total_centavos(self, tipo, mes=None):
+        where, params = self._filtro(mes)
+        with self._lectura() as conexion:
+            fila = conexion.execute(f"SELECT COALESCE(SUM(centavos), 0) FROM resumen_{tipo}{where}", params).fetchone()
+        return fila[0]
+
+    def total(self, tipo, mes=None):
+        return a_monto(self.total_centavos(tipo, mes))
+
+    def totales_por_mes(self):
+        """Centavos de ingresos y gastos de cada mes con movimientos, en orden"""
+        with self._lectura() as conexion:
+            totales = pd.read_sql_query(
+                "SELECT mes, SUM(ingresos) AS ingresos, SUM(gastos) AS gastos FROM ("
+                "SELECT mes, centavos AS ingresos, 0 AS gastos FROM resumen_ingresos "
+                "UNION ALL SELECT mes, 0, centavos FROM resumen_gastos"
+                ") GROUP BY mes ORDER BY mes",
+                conexion,
+            )
+        return totales.astype({"ingresos": "int64", "gastos": "int64"})
+
+    def gastos_por(self, columnas, mes=None):
+        """Suma de gastos agrupada por las columnas indicadas"""
+        if not set(columnas) <= COLUMNAS_AGRUPABLES:
+            raise ValueError(f"No se puede agrupar por: {columnas}")
+        where, params = self._filtro(mes)
+        # Igual que pandas, los gastos sin valor en la dimensión no forman grupo
+        condiciones = [f"{c} != ''" for c in columnas]
+        where = where + (" AND " if where else " WHERE ") + " AND ".join(condiciones)
+        grupo = ", ".join(columnas)
+        with self._lectura() as conexion:
+            return pd.read_sql_query(
+                f"SELECT {grupo}, SUM(centavos) / 100.0 AS monto FROM resumen_gastos{where} "
+                f"GROUP BY {grupo} ORDER BY {grupo}",
+                conexion,
+                params=params,
+            )
+
+
+def _leer_tablas(conexion):
+    data = datos_vacios()
+    # Una sola transacción de lectura: ingresos y gastos del mismo commit
+    conexion.execute("BEGIN")
+    try:
+        for tipo, columnas in COLUMNAS_SQL.items():
+            cursor = conexion.execute(f"SELECT {', '.join(columnas)} FROM {tipo} ORDER BY id")
+            data[tipo] = [_registro(tipo, fila) for fila in cursor]
+    finally:
+        conexion.rollback()
+    return data
+
+
+def _leer_presupuesto(conexion):
+    presupuesto = {}
+    for mes, categoria, monto in conexion.execute("SELECT mes, categoria, monto FROM presupuesto ORDER BY mes, rowid"):
+        presupuesto.setdefault(mes, {})[categoria] = monto
+    return presupuesto
+
+
+# ======= Almacenamiento SQLite =======
+class AlmacenamientoSQLite(Almacenamiento):
+    """
+    Libro y presupuesto en una base SQLite embebida. Si la base no existe y hay
+    archivos JSON previos, se importan una sola vez al abrirla.
+    """
+
+    def __init__(self, data_file, budget_file, db_file=None):
+        super().__init__()
+        self.data_file = data_file
+        self.budget_file = budget_file
+        if db_file is None:
+            db_file = f"{os.path.splitext(data_file)[0]}.db"
+        self.db_file = db_file
+        nueva = not os.path.exists(db_file)
+        # La conexión de escritura se comparte entre sesiones y las escrituras se
+        # serializan. Cada lectura abre una conexión propia y la cierra al terminar: con WAL
+        # ven el último commit y nunca el estado a medias de una transacción abierta
+        self.conexion = sqlite3.connect(db_file, check_same_thread=False)
+        self._bloqueo = threading.Lock()
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        columnas = self._columnas("ingresos")
+        if "monto" in columnas:
+            self.conexion.executescript(f"BEGIN; {APARTAR_MONTOS_DECIMALES} {ESQUEMA} {COPIAR_A_CENTAVOS} COMMIT;")
+        elif columnas and "uid" not in columnas:
+            self.conexion.executescript(f"BEGIN; {AGREGAR_UIDS} COMMIT;")
+        self.conexion.executescript(ESQUEMA)
+        self.conexion.executescript(ESQUEMA_RESUMENES)
+        if self.conexion.execute("PRAGMA user_version").fetchone()[0] < VERSION_ESQUEMA:
+            # Bases creadas antes de los resúmenes (o en decimales): se calculan una vez
+            with self.conexion:
+                self.conexion.executescript(RECONSTRUIR_RESUMENES)
+            self.conexion.execute(f"PRAGMA user_version = {VERSION_ESQUEMA}")
+        if nueva:
+            migrar_desde_json(self, data_file, budget_file)
+
+    def _lectura(self):
+        """Conexión de lectura para una consulta, cerrada al salir del `with`"""
+        return closing(sqlite3.connect(self.db_file))
+
+    def _columnas(self, tabla):
+        return [fila[1] for fila in self.conexion.execute(f"PRAGMA table_info({tabla})")]
+
+    def cargar_datos(self):
+        with self._lectura() as conexion:
+            return _leer_tablas(conexion)
+
+    @escritura
+    def guardar_datos(self, data):
+        asignar_ids(data)
+        with self._bloqueo, self.conexion:
+            for tipo in COLUMNAS:
+                self.conexion.execute(f"DELETE FROM {tipo}")
+                _insertar(self.conexion, tipo, data.get(tipo, []))
+        self._datos_modificados()
+
+    def _buscar(self, tipo, ids):
+        marcadores = ", ".join("?" for _ in ids)
+        filas = self.conexion.execute(
+            f"SELECT {', '.join(COLUMNAS_SQL[tipo])} FROM {tipo} WHERE uid IN ({marcadores})", list(ids)
+        )
+        return {registro["id"]: registro for registro in (_registro(tipo, fila) for fila in filas)}
+
+    @escritura
+    def registrar(self, operacion, data=None):
+        preparar_operacion(operacion)
+        op, tipo = operacion["op"], operacion.get("tipo")
+        with self._bloqueo, self.conexion:
+            if op in ("actualizar", "eliminar"):
+                # Los anteriores (para el clasificador) se leen en la misma transacción:
+                # ningún otro proceso escribe entre la lectura y el cambio
+                self.conexion.execute("BEGIN IMMEDIATE")
+                completar_anteriores(operacion, self._buscar)
+            if op == "agregar":
+                _insertar(self.conexion, tipo, [operacion["registro"]])
+            elif op == "agregar_lote":
+                for tipo_lote, registros in operacion["registros"].items():
+                    _insertar(self.conexion, tipo_lote, registros)
+            elif op == "actualizar":
+                asignaciones = ", ".join(f"{c} = ?" for c in COLUMNAS_SQL[tipo] + ["mes"])
+                cursor = self.conexion.execute(
+                    f"UPDATE {tipo} SET {asignaciones} WHERE uid = ?",
+                    _fila(tipo, operacion["registro"]) + (operacion["id"],),
+                )
+                if cursor.rowcount == 0:
+                    # Otra sesión lo borró: no se edita ninguna otra fila
+                    raise KeyError(f"Registro no encontrado: {operacion['id']}")
+            elif op == "eliminar":
+                self.conexion.executemany(f"DELETE FROM {tipo} WHERE uid = ?", [(i,) for i in operacion["ids"]])
+            elif op == "eliminar_mes":
+                for t in operacion["tipos"]:
+                    self.conexion.execute(f"DELETE FROM {t} WHERE mes = ?", (operacion["mes"],))
+            else:
+                raise ValueError(f"Operación desconocida: {op}")
+        self._datos_modificados()
+        if data is not None:
+            aplicar_operacion(data, operacion)
+
+    def consultas(self):
+        return ConsultasSQLite(self._lectura)
+
+    def cargar_presupuesto(self):
+        with self._lectura() as conexion:
+            return _leer_presupuesto(conexion)
+
+    @escritura
+    def guardar_presupuesto(self, presupuesto):
+        with self._bloqueo, self.conexion:
+            self.conexion.execute("DELETE FROM presupuesto")
+            self.conexion.executemany(
+                "INSERT INTO presupuesto (mes, categoria, monto) VALUES (?, ?, ?)",
+                [(mes, cat, monto) for mes, cats in presupuesto.items() for cat, monto in cats.items()],
+            )
+        self._presupuesto_modificado()
+
+
+# ======= Lectura sin modificar la base =======
+def leer_base(data_file, budget_file, db_file=None):
+    """
+    (datos, presupuesto) abriendo la base en solo lectura: no la crea, no migra
+    su esquema ni importa los JSON. Sin base, se leen los JSON que se importarían.
+    """
+    if db_file is None:
+        db_file = f"{os.path.splitext(data_file)[0]}.db"
+    if not os.path.exists(db_file):
+        origen = AlmacenamientoDiario(data_file, budget_file)
+        return origen._leer_libro(), origen.cargar_presupuesto()
+    conexion = sqlite3.connect(f"file:{os.path.abspath(db_file)}?mode=ro", uri=True)
+    try:
+        columnas = [fila[1] for fila in conexion.execute("PRAGMA table_info(ingresos)")]
+        if "uid" not in columnas:
+            raise ValueError(f"{db_file}: base con un esquema anterior, se migra al abrirla con el dashboard")
+        return _leer_tablas(conexion), _leer_presupuesto(conexion)
+    finally:
+        conexion.close()
+
+
+# ======= Migración desde JSON =======
+def migrar_desde_json(destino, data_file, budget_file):
+    """
+    Importa una sola vez el libro (snapshot + diario) y el presupuesto en JSON.
+    Los archivos de origen no se tocan: a un libro sin ids se le asignan en memoria.
+    """
+    origen = AlmacenamientoDiario(data_file, budget_file)
+    data = origen._leer_libro()
+    asignar_ids(data)
+    destino.guardar_datos(data)
+    destino.guardar_presupuesto(origen.cargar_presupuesto())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migra presupuesto_familiar.json y presupuesto_mensual.json a SQLite")
+    parser.add_argument("--datos", default="presupuesto_familiar.json")
+    parser.add_argument("--presupuesto", default="presupuesto_mensual.json")
+    parser.add_argument("--db", default=None, help="Ruta de la base (por defecto junto al archivo de datos)")
+    args = parser.parse_args()
+
+    almacen = AlmacenamientoSQLite(args.datos, args.presupuesto, args.db)
+    consultas = almacen.consultas()
+    print(f"{almacen.db_file}: {consultas.contar('ingresos')} ingresos, {consultas.contar('gastos')} gastos")
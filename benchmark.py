@@ -0,0 +1,280 @@
+# archivo: benchmark.py
+"""
+Mide la carga, el guardado y los cálculos del dashboard sobre libros sintéticos
+de distintos tamaños, sin servidor de Streamlit. Los resultados salen en JSON
+para comparar versiones:
+
+    python benchmark.py --tamanos 10000 100000 --salida actual.json
+    python benchmark.py --tamanos 10000 100000 --comparar base.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from almacenamiento import ConsultasMemoria, crear_almacenamiento
+from libro import CATEGORIAS, COLUMNAS, MEDIOS_PAGO, LibroContable
+from reportes import INDICE_SUBCATEGORIAS, balance_mes, reporte
+
+FORMATO_RESULTADOS = "benchmark-1"
+
+TAMANOS = [10_000, 100_000, 1_000_000]
+MODOS = ["diario", "json", "sqlite", "particionado"]
+REPETICIONES = 3
+
+# El libro sintético cubre MESES_LIBRO meses que terminan en MES_FINAL: fijos para
+# que dos versiones midan exactamente el mismo libro
+MES_FINAL = "2025-12"
+MESES_LIBRO = 36
+PROPORCION_INGRESOS = 0.08
+# La proyección del Balance se mide como si MES_FINAL fuera el mes en curso, a la mitad
+HOY = pd.Period(MES_FINAL, freq="M").start_time + pd.Timedelta(days=14)
+
+DESCRIPCIONES_INGRESOS = ["Sueldo", "Honorarios", "Arriendo cobrado", "Otros ingresos"]
+
+
+# ======= Libro sintético =======
+def _ids(rng, cantidad):
+    """Ids con el formato de nuevo_id, pero reproducibles a partir de la semilla"""
+    hexadecimal = rng.bytes(16 * cantidad).hex()
+    return [hexadecimal[i:i + 32] for i in range(0, 32 * cantidad, 32)]
+
+
+def _fechas(rng, cantidad):
+    fin = pd.Period(MES_FINAL, freq="M")
+    inicio = np.datetime64((fin - (MESES_LIBRO - 1)).start_time.date(), "D")
+    dias = (np.datetime64(fin.end_time.date(), "D") - inicio).astype(int) + 1
+    return np.datetime_as_string(inicio + rng.integers(0, dias, cantidad), unit="D").tolist()
+
+
+def _registros(columnas, valores):
+    return [dict(zip(columnas, fila)) for fila in zip(*valores)]
+
+
+def generar_libro(cantidad, semilla=0):
+    """
+    Libro con `cantidad` registros en el esquema real: ids, montos con dos
+    decimales, fechas AAAA-MM-DD repartidas en MESES_LIBRO meses y gastos sobre
+    el árbol de CATEGORIAS y los MEDIOS_PAGO del formulario.
+    """
+    rng = np.random.default_rng(semilla)
+    n_ingresos = int(cantidad * PROPORCION_INGRESOS)
+    n_gastos = cantidad - n_ingresos
+
+    ingresos = _registros(COLUMNAS["ingresos"], [
+        _ids(rng, n_ingresos),
+        rng.normal(3000, 600, n_ingresos).clip(50).round(2).tolist(),
+        rng.choice(DESCRIPCIONES_INGRESOS, n_ingresos).tolist(),
+        _fechas(rng, n_ingresos),
+    ])
+    pares = INDICE_SUBCATEGORIAS.to_frame(index=False)
+    eleccion = rng.integers(0, len(pares), n_gastos)
+    subcategorias = pares["subcategoria"].to_numpy()[eleccion].tolist()
+    gastos = _registros(COLUMNAS["gastos"], [
+        _ids(rng, n_gastos),
+        rng.lognormal(3.3, 0.9, n_gastos).round(2).clip(0.01).tolist(),
+        subcategorias,
+        pares["categoria"].to_numpy()[eleccion].tolist(),
+        subcategorias,
+        rng.choice(MEDIOS_PAGO, n_gastos).tolist(),
+        _fechas(rng, n_gastos),
+    ])
+    return {"ingresos": ingresos, "gastos": gastos}
+
+
+def generar_presupuesto(data, mes, semilla=0):
+    """Presupuesto del mes cerca de lo gastado por categoría: unas quedan por debajo y otras se exceden"""
+    rng = np.random.default_rng(semilla)
+    gastado = {categoria: 0.0 for categoria in CATEGORIAS}
+    for gasto in data["gastos"]:
+        if gasto["fecha"].startswith(mes):
+            gastado[gasto["categoria"]] += gasto["monto"]
+    factores = rng.uniform(0.8, 1.3, len(gastado))
+    return {mes: {c: round(m * f, 2) for (c, m), f in zip(gastado.items(), factores)}}
+
+
+# ======= Derivación de meses =======
+def meses_por_resumen(data):
+    """Meses disponibles desde el índice de resúmenes, construido a partir del libro"""
+    return ConsultasMemoria(lambda: data).meses_disponibles()
+
+
+def meses_por_libro(data):
+    """Tipado del libro (fecha, mes y clave_mes) y posiciones de cada mes, por tipo"""
+    libro = LibroContable(data)
+    return [libro.frame(tipo) for tipo in COLUMNAS]
+
+
+# ======= Mediciones =======
+def _medir(resultados, paso, funcion, *args):
+    gc.collect()
+    inicio = time.perf_counter()
+    valor = funcion(*args)
+    resultados.setdefault(paso, []).append(time.perf_counter() - inicio)
+    return valor
+
+
+def _abrir(modo, directorio, url):
+    return crear_almacenamiento(
+        modo,
+        os.path.join(directorio, "presupuesto_familiar.json"),
+        os.path.join(directorio, "presupuesto_mensual.json"),
+        url=url,
+    )
+
+
+def medir_modo(modo, data, presupuesto_mes, repeticiones, url=None):
+    """
+    Una pasada por repetición, cada una en un directorio nuevo: guardar el libro,
+    cargarlo con una instancia recién abierta, abrir sus consultas (primer rerun
+    tras un cambio de versión), Balance y Reporte del último mes y del libro
+    completo, y Eliminar por Mes al final porque modifica el libro.
+    """
+    tiempos = {}
+    for _ in range(repeticiones):
+        directorio = tempfile.mkdtemp(prefix="benchmark_")
+        try:
+            _medir(tiempos, "guardar_datos", _abrir(modo, directorio, url).guardar_datos, data)
+            _medir(tiempos, "cargar_datos", _abrir(modo, directorio, url).cargar_datos)
+            almacen = _abrir(modo, directorio, url)
+            consultas = almacen.consultas()
+            _medir(tiempos, "abrir_consultas", consultas.meses_disponibles)
+            _medir(tiempos, "balance", balance_mes, consultas, MES_FINAL, presupuesto_mes, HOY)
+            _medir(tiempos, "reporte_mes", reporte, consultas, MES_FINAL, presupuesto_mes, HOY)
+            _medir(tiempos, "reporte_todos", reporte, consultas, None, {}, HOY)
+            _medir(tiempos, "eliminar_mes", almacen.registrar, {"op": "eliminar_mes", "mes": MES_FINAL, "tipos": list(COLUMNAS)})
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+    return tiempos
+
+
+def medir_memoria(data, repeticiones):
+    """Pasos que no dependen del almacenamiento"""
+    tiempos = {}
+    for _ in range(repeticiones):
+        _medir(tiempos, "meses_resumen", meses_por_resumen, data)
+        _medir(tiempos, "meses_libro", meses_por_libro, data)
+    return tiempos
+
+
+def _filas(modo, cantidad, tiempos):
+    return [
+        {
+            "modo": modo,
+            "registros": cantidad,
+            "paso": paso,
+            "segundos": [round(s, 6) for s in segundos],
+            "mediana": round(statistics.median(segundos), 6),
+            "minimo": round(min(segundos), 6),
+        }
+        for paso, segundos in tiempos.items()
+    ]
+
+
+def _commit():
+    try:
+        salida = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10
+        )
+    except OSError:
+        return None
+    return salida.stdout.strip() or None
+
+
+def ejecutar(tamanos=TAMANOS, modos=MODOS, repeticiones=REPETICIONES, url=None, semilla=0, progreso=None):
+    """Mide cada modo en cada tamaño; devuelve el documento de resultados"""
+    resultados = []
+    for cantidad in tamanos:
+        if progreso:
+            progreso(f"{cantidad:,} registros: generando libro")
+        data = generar_libro(cantidad, semilla)
+        presupuesto_mes = generar_presupuesto(data, MES_FINAL, semilla)[MES_FINAL]
+        resultados += _filas("memoria", cantidad, medir_memoria(data, repeticiones))
+        for modo in modos:
+            if progreso:
+                progreso(f"{cantidad:,} registros: {modo}")
+            resultados += _filas(modo, cantidad, medir_modo(modo, data, presupuesto_mes, repeticiones, url))
+    return {
+        "formato": FORMATO_RESULTADOS,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "entorno": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+        },
+        "parametros": {"repeticiones": repeticiones, "semilla": semilla, "mes_final": MES_FINAL, "meses": MESES_LIBRO},
+        "resultados": resultados,
+    }
+
+
+# ======= Comparación entre versiones =======
+def comparar(base, actual):
+    """Cociente de medianas actual / base por (modo, registros, paso) presentes en ambos"""
+    medianas = {(r["modo"], r["registros"], r["paso"]): r["mediana"] for r in base["resultados"]}
+    return [
+        {
+            "modo": r["modo"], "registros": r["registros"], "paso": r["paso"],
+            "base": medianas[clave], "actual": r["mediana"],
+            "cociente": r["mediana"] / medianas[clave] if medianas[clave] else float("inf"),
+        }
+        for r in actual["resultados"]
+        if (clave := (r["modo"], r["registros"], r["paso"])) in medianas
+    ]
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmark del libro y los cálculos del dashboard")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS, help="cantidad de registros de cada libro")
+    parser.add_argument("--modos", nargs="+", default=MODOS, help="modos de almacenamiento a medir")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--url", help="DATABASE_URL para el modo sql")
+    parser.add_argument("--salida", help="archivo JSON de resultados (por omisión, la salida estándar)")
+    parser.add_argument("--comparar", metavar="BASE", help="resultados anteriores contra los que comparar")
+    parser.add_argument("--tolerancia", type=float, default=1.25,
+                        help="con --comparar, termina con código 1 si algún paso es más lento que base × tolerancia")
+    args = parser.parse_args(argumentos)
+    if "sql" in args.modos and not args.url:
+        parser.error("el modo sql necesita --url")
+
+    def progreso(mensaje):
+        print(mensaje, file=sys.stderr, flush=True)
+
+    documento = ejecutar(args.tamanos, args.modos, args.repeticiones, args.url, args.semilla, progreso)
+    texto = json.dumps(documento, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w") as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, "r") as f:
+            filas = comparar(json.load(f), documento)
+        regresiones = [f for f in filas if f["cociente"] > args.tolerancia]
+        for fila in filas:
+            marca = "  <-- más lento" if fila in regresiones else ""
+            progreso(
+                f"{fila['modo']:>13} {fila['registros']:>9,} {fila['paso']:<16} "
+                f"{fila['base']:>9.4f}s -> {fila['actual']:>9.4f}s  x{fila['cociente']:.2f}{marca}"
+            )
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# archivo: clasificador.py
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+import pandas as pd
+
+# Palabras que aparecen en cualquier gasto y no ayudan a distinguir la categoría
+PALABRAS_VACIAS = {"del", "los", "las", "por", "para", "con", "una", "uno", "pago", "compra"}
+
+
+def normalizar_descripcion(texto):
+    """Minúsculas, sin tildes ni espacios repetidos"""
+    texto = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(texto.lower().split())
+
+
+def tokens(texto_normalizado):
+    """Palabras útiles de una descripción ya normalizada (sin números sueltos ni palabras cortas)"""
+    return {
+        t for t in re.findall(r"[a-z0-9]+", texto_normalizado)
+        if len(t) > 2 and not t.isdigit() and t not in PALABRAS_VACIAS
+    }
+
+
+class ClasificadorGastos:
+    """
+    Sugiere categoría, subcategoría y medio de pago a partir de la descripción.
+    Guarda votos (cuántos gastos) por descripción exacta y por palabra; cada
+    operación del libro los actualiza con un delta, como el IndiceResumen.
+    """
+
+    def __init__(self):
+        # descripción normalizada -> Counter{(categoria, subcategoria, medio_pago): cantidad}
+        self.exactas = {}
+        # palabra -> Counter{(categoria, subcategoria, medio_pago): cantidad}
+        self.palabras = {}
+        self._bloqueo = threading.Lock()
+
+    @classmethod
+    def desde_registros(cls, gastos):
+        """Entrena con el libro tipado de gastos agrupando descripciones repetidas"""
+        clasificador = cls()
+        # Igual que _sumar: los gastos sin categoría, subcategoría o medio de pago no votan
+        gastos = gastos.dropna(subset=["categoria", "subcategoria", "medio_pago"])
+        if gastos.empty:
+            return clasificador
+        descripciones = (
+            gastos["descripcion"].astype(str)
+            .str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+            .str.lower().str.split().str.join(" ")
+        )
+        claves = gastos[["categoria", "subcategoria", "medio_pago"]].astype(str).assign(descripcion=descripciones.to_numpy())
+        conteos = claves.groupby(["descripcion", "categoria", "subcategoria", "medio_pago"], observed=True).size()
+        for (descripcion, *clave), cantidad in conteos.items():
+            clasificador._votar(descripcion, tuple(clave), int(cantidad))
+        return clasificador
+
+    # ======= Actualización incremental =======
+    def _votar(self, descripcion, clave, cantidad):
+        for indice, llave in [(self.exactas, descripcion)] + [(self.palabras, t) for t in tokens(descripcion)]:
+            votos = indice.setdefault(llave, Counter())
+            votos[clave] += cantidad
+            if votos[clave] <= 0:
+                del votos[clave]
+                if not votos:
+                    del indice[llave]
+
+    def _sumar(self, registro, signo):
+        clave = (registro.get("categoria"), registro.get("subcategoria"), registro.get("medio_pago"))
+        if None in clave:
+            return
+        with self._bloqueo:
+            self._votar(normalizar_descripcion(registro.get("descripcion", "")), clave, signo)
+
+    def aplicar(self, operacion):
+        """Aprende (u olvida) los gastos de una operación del libro; los ingresos no cuentan"""
+        op = operacion["op"]
+        if op == "agregar_lote":
+            for registro in operacion["registros"].get("gastos", []):
+                self._sumar(registro, 1)
+            return
+        if operacion.get("tipo") != "gastos" and op != "eliminar_mes":
+            return
+        if op == "agregar":
+            self._sumar(operacion["registro"], 1)
+        elif op == "actualizar":
+            if "anterior" in operacion:
+                self._sumar(operacion["anterior"], -1)
+            self._sumar(operacion["registro"], 1)
+        elif op == "eliminar":
+            for registro in operacion.get("anteriores", []):
+                self._sumar(registro, -1)
+        elif op == "eliminar_mes":
+            raise ValueError("La operación no incluye los registros eliminados")
+        else:
+            raise ValueError(f"Operación desconocida: {op}")
+
+    # ======= Consultas =======
+    def sugerir(self, descripcion):
+        """
+        Sugerencia para una descripción o None si no se parece a ningún gasto.
+        Devuelve categoria, subcategoria, medio_pago y la confianza (0 a 1).
+        """
+        texto = normalizar_descripcion(descripcion)
+        with self._bloqueo:
+            votos = self.exactas.get(texto)
+            if votos is not None:
+                puntajes, peso = Counter(votos), sum(votos.values())
+            else:
+                # Cada palabra reparte un voto según sus frecuencias
+                puntajes, palabras = Counter(), tokens(texto)
+                for palabra in palabras:
+                    votos_palabra = self.palabras.get(palabra)
+                    if votos_palabra:
+                        total = sum(votos_palabra.values())
+                        for clave, cantidad in votos_palabra.items():
+                            puntajes[clave] += cantidad / total
+                peso = len(palabras)
+        if not puntajes:
+            return None
+        por_categoria = Counter()
+        for (categoria, subcategoria, _), puntaje in puntajes.items():
+            por_categoria[(categoria, subcategoria)] += puntaje
+        (categoria, subcategoria), puntaje = por_categoria.most_common(1)[0]
+        medio_pago = max(
+            (c for c in puntajes if c[:2] == (categoria, subcategoria)), key=puntajes.get
+        )[2]
+        return {
+            "categoria": categoria,
+            "subcategoria": subcategoria,
+            "medio_pago": medio_pago,
+            "confianza": puntaje / peso,
+        }
+
+    def clasificar(self, descripciones):
+        """Sugerencias en bloque (una búsqueda por descripción distinta); NaN donde no hay"""
+        descripciones = pd.Series(descripciones)
+        sugerencias = {d: self.sugerir(d) for d in descripciones.unique()}
+        filas = [sugerencias[d] or {} for d in descripciones]
+        return pd.DataFrame(
+            filas, index=descripciones.index, columns=["categoria", "subcategoria", "medio_pago", "confianza"]
+        )
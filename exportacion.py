@@ -0,0 +1,458 @@
+# archivo: exportacion.py
+"""
+Exportación de Reporte Detallado a CSV (un ZIP con un CSV por sección), XLSX y
+PDF, sin dependencias nuevas. Cada sección es un título, sus columnas con tipo y
+un iterador de filas: los detalles recorren el libro tipado por bloques de
+TAMANO_BLOQUE registros y cada escritor formatea valor por valor al escribir,
+así exportar todo el historial ocupa memoria acotada y nunca se arman columnas
+de texto con los montos formateados.
+"""
+import csv
+import io
+import re
+import tempfile
+import zipfile
+from datetime import date
+from xml.sax.saxutils import escape
+
+# Registros del libro que se convierten a la vez
+TAMANO_BLOQUE = 5_000
+
+# Formato -> (extensión, tipo MIME)
+FORMATOS = {
+    "csv": ("zip", "application/zip"),
+    "xlsx": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "pdf": ("pdf", "application/pdf"),
+}
+
+# Columnas de cada detalle: (título, columna del libro, tipo)
+COLUMNAS_INGRESOS = [
+    ("Fecha", "fecha", "fecha"),
+    ("Monto", "monto", "monto"),
+    ("Descripción", "descripcion", "texto"),
+]
+COLUMNAS_GASTOS = [
+    ("Fecha", "fecha", "fecha"),
+    ("Categoría", "categoria", "texto"),
+    ("Subcategoría", "subcategoria", "texto"),
+    ("Monto", "monto", "monto"),
+    ("Descripción", "descripcion", "texto"),
+    ("Medio de Pago", "medio_pago", "texto"),
+]
+
+
+# ======= Secciones del reporte =======
+def seccion(titulo, columnas, filas):
+    """`columnas`: (título, columna, tipo) con tipo texto, monto, fecha o porcentaje"""
+    return {"titulo": titulo, "columnas": columnas, "filas": filas}
+
+
+def _valores(serie, tipo):
+    if tipo == "fecha":
+        return serie.dt.date.tolist()
+    return serie.tolist()
+
+
+def filas_por_bloques(df, columnas):
+    """Filas de `df` como tuplas, convertidas de a TAMANO_BLOQUE registros"""
+    for inicio in range(0, len(df), TAMANO_BLOQUE):
+        bloque = df.iloc[inicio:inicio + TAMANO_BLOQUE]
+        yield from zip(*(_valores(bloque[columna], tipo) for _, columna, tipo in columnas))
+
+
+def _tabla(titulo, df, tipos):
+    """Sección de un resumen ya agregado (pocas filas) cuyas columnas son los títulos"""
+    columnas = [(nombre, nombre, tipos.get(nombre, "texto")) for nombre in df.columns]
+    return seccion(titulo, columnas, filas_por_bloques(df, columnas))
+
+
+def secciones_reporte(consultas, resultado):
+    """Secciones de Reporte Detallado para el `resultado` de reportes.reporte()"""
+    mes = resultado["mes"]
+    resumen = [
+        ("Total Ingresos", resultado["total_ingresos"]),
+        ("Total Gastos", resultado["total_gastos"]),
+        ("Presupuesto", resultado["total_presupuesto"]),
+        ("Balance Final", resultado["balance"]),
+    ]
+    secciones = [seccion("Resumen Ejecutivo", [("Concepto", "concepto", "texto"), ("Monto", "monto", "monto")], resumen)]
+    if resultado["analisis"] is not None:
+        analisis = resultado["analisis"].copy()
+        # Sin el emoji del estado: no está en las fuentes del PDF ni suma en una planilla
+        analisis["Estado"] = analisis["Estado"].str.split(" ", n=1).str[-1]
+        secciones.append(_tabla("Análisis por Categorías", analisis, {
+            "Presupuestado": "monto", "Gastado": "monto", "Diferencia": "monto", "% Usado": "porcentaje",
+        }))
+    secciones.append(seccion("Detalle de Ingresos", COLUMNAS_INGRESOS,
+                             filas_por_bloques(consultas.registros("ingresos", mes), COLUMNAS_INGRESOS)))
+    secciones.append(seccion("Detalle de Gastos", COLUMNAS_GASTOS,
+                             filas_por_bloques(consultas.registros("gastos", mes), COLUMNAS_GASTOS)))
+    tipos_resumen = {"Monto Total": "monto", "Porcentaje": "porcentaje"}
+    if resultado["subcategorias"] is not None:
+        secciones.append(_tabla("Resumen por Subcategoría", resultado["subcategorias"], tipos_resumen))
+    if resultado["medios_pago"] is not None:
+        secciones.append(_tabla("Resumen por Medio de Pago", resultado["medios_pago"], tipos_resumen))
+    return secciones
+
+
+def _vacio(valor):
+    return valor is None or valor != valor
+
+
+def _texto(valor, tipo):
+    """Valor para mostrar (PDF): montos con signo de pesos y separador de miles"""
+    if _vacio(valor):
+        return ""
+    if tipo == "monto":
+        return f"${valor:,.2f}"
+    if tipo == "porcentaje":
+        return f"{valor:.1f}%"
+    if tipo == "fecha":
+        return valor.isoformat()
+    return str(valor)
+
+
+# ======= CSV =======
+def _csv(valor, tipo):
+    """Valor para CSV: números sin formato, para que otra planilla los pueda sumar"""
+    if _vacio(valor):
+        return ""
+    if tipo == "monto":
+        return f"{valor:.2f}"
+    if tipo == "fecha":
+        return valor.isoformat()
+    return valor
+
+
+def _nombre_archivo(titulo):
+    return re.sub(r"[^a-z0-9]+", "_", titulo.lower().translate(str.maketrans("áéíóúñ", "aeioun"))).strip("_")
+
+
+def exportar_csv(secciones, archivo, titulo=None):
+    """Un CSV por sección dentro de un ZIP; cada uno se escribe directo al comprimido"""
+    with zipfile.ZipFile(archivo, "w", zipfile.ZIP_DEFLATED) as zip_salida:
+        for numero, sec in enumerate(secciones, 1):
+            nombre = f"{numero:02d}_{_nombre_archivo(sec['titulo'])}.csv"
+            with zip_salida.open(nombre, "w", force_zip64=True) as binario:
+                # Con BOM: Excel abre así los acentos correctamente
+                texto = io.TextIOWrapper(binario, encoding="utf-8-sig", newline="")
+                escritor = csv.writer(texto)
+                escritor.writerow([c[0] for c in sec["columnas"]])
+                tipos = [c[2] for c in sec["columnas"]]
+                for fila in sec["filas"]:
+                    escritor.writerow([_csv(v, t) for v, t in zip(fila, tipos)])
+                texto.flush()
+                texto.detach()
+
+
+# ======= XLSX =======
+# Filas por hoja en Excel: una sección más larga sigue en otra hoja
+LIMITE_FILAS_XLSX = 1_048_576
+FILAS_POR_ESCRITURA = 1_000
+_FECHA_BASE_XLSX = date(1899, 12, 30)
+_CONTROL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+# Índice en cellXfs de styles.xml para cada tipo de celda
+_ESTILOS_XLSX = {"titulo": 1, "monto": 2, "fecha": 3, "porcentaje": 4}
+_ANCHOS = {"fecha": 12, "monto": 14, "porcentaje": 10, "texto": 28}
+
+_NS_HOJA = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+_NS_RELACIONES = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+_ESTILOS_XML = (
+    f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><styleSheet {_NS_HOJA}>'
+    '<numFmts count="3"><numFmt numFmtId="164" formatCode="&quot;$&quot;#,##0.00"/>'
+    '<numFmt numFmtId="165" formatCode="yyyy-mm-dd"/><numFmt numFmtId="166" formatCode="0.0&quot;%&quot;"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="5"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="166" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles></styleSheet>'
+)
+
+
+def _letra_columna(indice):
+    letras = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _celda(referencia, valor, tipo):
+    if _vacio(valor):
+        return ""
+    if tipo == "texto" or isinstance(valor, str):
+        texto = escape(_CONTROL.sub("", str(valor)))
+        estilo = ' s="1"' if tipo == "titulo" else ""
+        return f'<c r="{referencia}" t="inlineStr"{estilo}><is><t xml:space="preserve">{texto}</t></is></c>'
+    if tipo == "fecha":
+        valor = (valor - _FECHA_BASE_XLSX).days
+    elif tipo == "monto":
+        valor = round(float(valor), 2)
+    else:
+        valor = float(valor)
+    return f'<c r="{referencia}" s="{_ESTILOS_XLSX[tipo]}"><v>{valor}</v></c>'
+
+
+def _nombre_hoja(titulo, usados):
+    nombre = re.sub(r"[\[\]:*?/\\]", "", titulo)[:31]
+    base, numero = nombre, 2
+    while nombre.lower() in usados:
+        sufijo = f" ({numero})"
+        nombre, numero = base[:31 - len(sufijo)] + sufijo, numero + 1
+    usados.add(nombre.lower())
+    return nombre
+
+
+class _HojaXLSX:
+    """Hoja escrita fila por fila dentro del ZIP; la tabla completa nunca está en memoria"""
+
+    def __init__(self, zip_salida, numero, columnas):
+        self.columnas = [(_letra_columna(i), tipo) for i, (_, _, tipo) in enumerate(columnas)]
+        self.salida = zip_salida.open(f"xl/worksheets/sheet{numero}.xml", "w", force_zip64=True)
+        anchos = "".join(
+            f'<col min="{i}" max="{i}" width="{_ANCHOS[tipo]}" customWidth="1"/>'
+            for i, (_, _, tipo) in enumerate(columnas, 1)
+        )
+        self.salida.write((
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><worksheet {_NS_HOJA} {_NS_RELACIONES}>'
+            '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+            f'</sheetView></sheetViews><cols>{anchos}</cols><sheetData>'
+        ).encode())
+        self.filas = 0
+        self._pendientes = []
+        self.escribir([c[0] for c in columnas], titulo=True)
+
+    def escribir(self, fila, titulo=False):
+        self.filas += 1
+        celdas = "".join(
+            _celda(f"{letra}{self.filas}", valor, "titulo" if titulo else tipo)
+            for (letra, tipo), valor in zip(self.columnas, fila)
+        )
+        self._pendientes.append(f'<row r="{self.filas}">{celdas}</row>')
+        # Se comprime de a FILAS_POR_ESCRITURA filas, no una llamada por fila
+        if len(self._pendientes) == FILAS_POR_ESCRITURA:
+            self._volcar()
+
+    def _volcar(self):
+        self.salida.write("".join(self._pendientes).encode())
+        self._pendientes.clear()
+
+    def cerrar(self):
+        self._volcar()
+        self.salida.write(b"</sheetData></worksheet>")
+        self.salida.close()
+
+
+def exportar_xlsx(secciones, archivo, titulo=None):
+    """Una hoja por sección; las hojas se escriben primero y el libro que las lista al final"""
+    hojas = []
+    usados = set()
+    with zipfile.ZipFile(archivo, "w", zipfile.ZIP_DEFLATED) as zip_salida:
+        for sec in secciones:
+            hojas.append(_nombre_hoja(sec["titulo"], usados))
+            hoja = _HojaXLSX(zip_salida, len(hojas), sec["columnas"])
+            for fila in sec["filas"]:
+                if hoja.filas == LIMITE_FILAS_XLSX:
+                    hoja.cerrar()
+                    hojas.append(_nombre_hoja(sec["titulo"], usados))
+                    hoja = _HojaXLSX(zip_salida, len(hojas), sec["columnas"])
+                hoja.escribir(fila)
+            hoja.cerrar()
+
+        numeros = range(1, len(hojas) + 1)
+        zip_salida.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            + "".join(
+                f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for n in numeros
+            )
+            + '</Types>'
+        ))
+        zip_salida.writestr("_rels/.rels", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ))
+        zip_salida.writestr("xl/workbook.xml", (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><workbook {_NS_HOJA} {_NS_RELACIONES}><sheets>'
+            + "".join(f'<sheet name="{escape(nombre)}" sheetId="{n}" r:id="rId{n}"/>' for n, nombre in zip(numeros, hojas))
+            + '</sheets></workbook>'
+        ))
+        zip_salida.writestr("xl/_rels/workbook.xml.rels", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + "".join(
+                f'<Relationship Id="rId{n}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                f'Target="worksheets/sheet{n}.xml"/>'
+                for n in numeros
+            )
+            + f'<Relationship Id="rId{len(hojas) + 1}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+            'Target="styles.xml"/></Relationships>'
+        ))
+        zip_salida.writestr("xl/styles.xml", _ESTILOS_XML)
+
+
+# ======= PDF =======
+# A4 apaisado en puntos, con Courier (ancho fijo: las columnas se alinean contando caracteres)
+ANCHO_PAGINA, ALTO_PAGINA = 842, 595
+MARGEN = 36
+TAMANO_LETRA = 8
+INTERLINEADO = 10
+# Caracteres de una columna de texto como máximo (más allá se corta con "…")
+ANCHO_TEXTO_PDF = 48
+_CARACTERES_LINEA = int((ANCHO_PAGINA - 2 * MARGEN) / (TAMANO_LETRA * 0.6))
+_LINEAS_PAGINA = int((ALTO_PAGINA - 2 * MARGEN) / INTERLINEADO) - 2
+
+
+class _DocumentoPDF:
+    """
+    PDF escrito página por página: de cada página ya escrita solo se guarda la
+    posición de sus objetos, para la tabla xref del final.
+    """
+
+    # Objetos fijos: catálogo, árbol de páginas y las dos fuentes
+    CATALOGO, PAGINAS, FUENTE, FUENTE_NEGRITA = 1, 2, 3, 4
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.posicion = 0
+        self.posiciones = {}
+        self.paginas = []
+        self.siguiente = self.FUENTE_NEGRITA + 1
+        self._escribir(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _escribir(self, contenido):
+        self.archivo.write(contenido)
+        self.posicion += len(contenido)
+
+    def _objeto(self, numero, cuerpo):
+        self.posiciones[numero] = self.posicion
+        self._escribir(f"{numero} 0 obj\n".encode() + cuerpo + b"\nendobj\n")
+
+    def pagina(self, lineas):
+        """`lineas`: (texto, negrita) de arriba hacia abajo"""
+        comandos = [f"BT {INTERLINEADO} TL {MARGEN} {ALTO_PAGINA - MARGEN} Td".encode()]
+        fuente_actual = None
+        for texto, negrita in lineas:
+            fuente = "F2" if negrita else "F1"
+            if fuente != fuente_actual:
+                comandos.append(f"/{fuente} {TAMANO_LETRA} Tf".encode())
+                fuente_actual = fuente
+            comandos.append(b"(" + _cadena_pdf(texto) + b") Tj T*")
+        comandos.append(b"ET")
+        contenido = b"\n".join(comandos)
+        numero_contenido, numero_pagina = self.siguiente, self.siguiente + 1
+        self.siguiente += 2
+        self._objeto(numero_contenido, f"<< /Length {len(contenido)} >>\nstream\n".encode() + contenido + b"\nendstream")
+        self._objeto(numero_pagina, (
+            f"<< /Type /Page /Parent {self.PAGINAS} 0 R /MediaBox [0 0 {ANCHO_PAGINA} {ALTO_PAGINA}] "
+            f"/Resources << /Font << /F1 {self.FUENTE} 0 R /F2 {self.FUENTE_NEGRITA} 0 R >> >> "
+            f"/Contents {numero_contenido} 0 R >>"
+        ).encode())
+        self.paginas.append(numero_pagina)
+
+    def cerrar(self):
+        hijos = " ".join(f"{n} 0 R" for n in self.paginas)
+        self._objeto(self.PAGINAS, f"<< /Type /Pages /Kids [{hijos}] /Count {len(self.paginas)} >>".encode())
+        self._objeto(self.CATALOGO, f"<< /Type /Catalog /Pages {self.PAGINAS} 0 R >>".encode())
+        for numero, nombre in ((self.FUENTE, "Courier"), (self.FUENTE_NEGRITA, "Courier-Bold")):
+            self._objeto(numero, f"<< /Type /Font /Subtype /Type1 /BaseFont /{nombre} /Encoding /WinAnsiEncoding >>".encode())
+        inicio_xref = self.posicion
+        total = self.siguiente
+        entradas = [b"0000000000 65535 f \n"] + [f"{self.posiciones[n]:010d} 00000 n \n".encode() for n in range(1, total)]
+        self._escribir(f"xref\n0 {total}\n".encode() + b"".join(entradas))
+        self._escribir(f"trailer\n<< /Size {total} /Root {self.CATALOGO} 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n".encode())
+
+
+def _cadena_pdf(texto):
+    # WinAnsiEncoding ~ cp1252: acentos y ñ se ven; lo que no entra (emojis) se reemplaza
+    codificado = texto.encode("cp1252", errors="replace")
+    return codificado.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _anchos_pdf(columnas):
+    """Caracteres por columna: fijos para números y fechas, el resto se reparte entre los textos"""
+    fijos = {"fecha": 10, "monto": 15, "porcentaje": 8}
+    textos = sum(1 for c in columnas if c[2] not in fijos)
+    libre = _CARACTERES_LINEA - sum(fijos.get(c[2], 0) for c in columnas) - 2 * (len(columnas) - 1)
+    ancho_texto = min(max(libre // textos, 8), ANCHO_TEXTO_PDF) if textos else 0
+    return [fijos.get(c[2], ancho_texto) for c in columnas]
+
+
+def _linea_pdf(valores, anchos, tipos):
+    celdas = []
+    for valor, ancho, tipo in zip(valores, anchos, tipos):
+        if len(valor) > ancho:
+            valor = valor[:ancho - 1] + "…"
+        celdas.append(valor.ljust(ancho) if tipo in ("texto", "fecha") else valor.rjust(ancho))
+    return "  ".join(celdas).rstrip()
+
+
+def exportar_pdf(secciones, archivo, titulo=None):
+    """Tablas de texto; en cada página nueva se repiten el título y el encabezado de la sección"""
+    documento = _DocumentoPDF(archivo)
+    lineas = []
+
+    def cerrar_pagina():
+        lineas.append(("", False))
+        lineas.append((f"Página {len(documento.paginas) + 1}".rjust(_CARACTERES_LINEA), False))
+        documento.pagina(lineas)
+        lineas.clear()
+
+    if titulo:
+        lineas += [(titulo, True), ("", False)]
+    for sec in secciones:
+        anchos = _anchos_pdf(sec["columnas"])
+        tipos = [c[2] for c in sec["columnas"]]
+        encabezado = [
+            (_linea_pdf([c[0] for c in sec["columnas"]], anchos, ["texto"] * len(tipos)), True),
+            ("-" * min(sum(anchos) + 2 * (len(anchos) - 1), _CARACTERES_LINEA), False),
+        ]
+        # Título y encabezado no quedan solos al pie de una página
+        if len(lineas) + 4 > _LINEAS_PAGINA:
+            cerrar_pagina()
+        lineas += [(sec["titulo"], True)] + encabezado
+        filas = 0
+        for fila in sec["filas"]:
+            if len(lineas) == _LINEAS_PAGINA:
+                cerrar_pagina()
+                lineas += [(f"{sec['titulo']} (continuación)", True)] + encabezado
+            lineas.append((_linea_pdf([_texto(v, t) for v, t in zip(fila, tipos)], anchos, tipos), False))
+            filas += 1
+        if not filas:
+            lineas.append(("Sin registros", False))
+        lineas.append(("", False))
+    cerrar_pagina()
+    documento.cerrar()
+
+
+EXPORTADORES = {"csv": exportar_csv, "xlsx": exportar_xlsx, "pdf": exportar_pdf}
+
+
+def exportar(formato, secciones, titulo=None):
+    """
+    Archivo temporal (en disco pasado el primer MB) con el reporte en `formato`,
+    listo para leer desde el principio.
+    """
+    archivo = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+    EXPORTADORES[formato](secciones, archivo, titulo)
+    archivo.seek(0)
+    return archivo
+
+
+def exportar_reporte(formato, consultas, resultado, titulo=None):
+    """Reporte Detallado exportado; las secciones se arman en cada llamada porque sus filas se consumen al escribir"""
+    return exportar(formato, secciones_reporte(consultas, resultado), titulo)
@@ -0,0 +1,170 @@
+# archivo: graficos.py
+import altair as alt
+import pandas as pd
+
+# Orden y colores fijos del gráfico de balance
+ORDEN_BALANCE = ["Ingresos", "Gastos", "Balance"]
+COLORES_BALANCE = ["green", "red", "blue"]
+
+
+# ======= Especificaciones Vega-Lite =======
+# Cada función recibe datos ya agregados (una fila por categoría o subcategoría)
+# y devuelve el dict de la especificación: armarlo y validarlo es lo costoso, y el
+# dict se puede guardar en caché y pasar tal cual a st.vega_lite_chart.
+def grafico_presupuesto(montos):
+    """Barras del presupuesto del mes; `montos` son pares (categoría, monto)"""
+    df = pd.DataFrame(list(montos), columns=["Categoría", "Presupuesto"]).astype({"Presupuesto": float})
+    color_scale = alt.Scale(domain=df["Categoría"].tolist(), scheme="category10")
+    return alt.Chart(df).mark_bar().encode(
+        x=alt.X("Categoría", sort=None),
+        y="Presupuesto",
+        color=alt.Color("Categoría", scale=color_scale, legend=None)
+    ).to_dict()
+
+
+def grafico_balance(total_ingresos, total_gastos, balance):
+    df = pd.DataFrame({"Tipo": ORDEN_BALANCE, "Monto": [total_ingresos, total_gastos, balance]})
+    return alt.Chart(df).mark_bar().encode(
+        x=alt.X("Tipo", sort=ORDEN_BALANCE),
+        y="Monto",
+        color=alt.Color(
+            "Tipo",
+            scale=alt.Scale(domain=ORDEN_BALANCE, range=COLORES_BALANCE),
+            legend=alt.Legend(title="Tipo")
+        ),
+        tooltip=["Tipo", "Monto"]
+    ).to_dict()
+
+
+def grafico_subcategorias(subcat_df):
+    """Barras por subcategoría; en rojo las de categorías que superan su presupuesto"""
+    color_scale = alt.Scale(domain=subcat_df["Categoría"].unique().tolist(), scheme="category10")
+    return alt.Chart(subcat_df).mark_bar().encode(
+        x="Subcategoría",
+        y="Gastado",
+        color=alt.condition(
+            alt.datum.Excedido,
+            alt.value("red"),
+            alt.Color("Categoría", scale=color_scale, legend=None)
+        ),
+        tooltip=["Categoría", "Subcategoría", "Gastado", "Presupuesto"]
+    ).to_dict()
+
+
+def grafico_torta_categorias(gastos_por_cat):
+    """
+    Torta de gastos por categoría con el porcentaje sobre las porciones de más
+    del 5%; `gastos_por_cat` es reportes.porcentajes_categorias
+    """
+    base_chart = alt.Chart(gastos_por_cat).add_params(alt.selection_point())
+
+    pie_chart = base_chart.mark_arc(outerRadius=120).encode(
+        theta=alt.Theta("Total:Q"),
+        color=alt.Color(
+            "Categoría:N",
+            scale=alt.Scale(scheme="category10"),
+            legend=alt.Legend(title="Categorías", orient="right")
+        ),
+        tooltip=["Categoría:N",
+                 alt.Tooltip("Total:Q", format="$,.0f"),
+                 alt.Tooltip("Porcentaje:Q", format=".1f", title="Porcentaje %")]
+    )
+
+    text_chart = base_chart.mark_text(
+        align="center",
+        baseline="middle",
+        fontSize=10,
+        fontWeight="bold"
+    ).encode(
+        theta=alt.Theta("Total:Q"),
+        text=alt.condition(
+            alt.datum.Porcentaje > 5,
+            alt.Text("Porcentaje:Q", format=".1f"),
+            alt.value("")
+        ),
+        color=alt.value("white")
+    )
+
+    return (pie_chart + text_chart).resolve_scale(color="independent").to_dict()
+
+
+# ======= Series de tiempo =======
+def _meses_a_fechas(df):
+    """La columna "mes" (AAAA-MM) como primer día del mes, para un eje temporal"""
+    return df.assign(mes=pd.to_datetime(df["mes"], format="%Y-%m"))
+
+
+def grafico_flujo_mensual(serie):
+    """Ingresos y gastos de cada mes con su media móvil (línea punteada)"""
+    df = _meses_a_fechas(serie.reset_index())
+    mensual = df.melt("mes", ["ingresos", "gastos"], var_name="Serie", value_name="Monto")
+    tendencia = df.melt("mes", ["tendencia_ingresos", "tendencia_gastos"], var_name="Serie", value_name="Monto")
+    mensual["Serie"] = mensual["Serie"].map({"ingresos": "Ingresos", "gastos": "Gastos"})
+    tendencia["Serie"] = tendencia["Serie"].map({"tendencia_ingresos": "Ingresos", "tendencia_gastos": "Gastos"})
+    color = alt.Color("Serie:N", scale=alt.Scale(domain=["Ingresos", "Gastos"], range=["green", "red"]))
+    x = alt.X("mes:T", title="Mes", axis=alt.Axis(format="%Y-%m"))
+    lineas = alt.Chart(mensual).mark_line(point=True).encode(
+        x=x, y=alt.Y("Monto:Q", title="Monto"), color=color,
+        tooltip=[alt.Tooltip("mes:T", format="%Y-%m"), "Serie:N", alt.Tooltip("Monto:Q", format="$,.2f")]
+    )
+    medias = alt.Chart(tendencia).mark_line(strokeDash=[6, 4], opacity=0.7).encode(x=x, y="Monto:Q", color=color)
+    return (lineas + medias).to_dict()
+
+
+def grafico_saldo(serie):
+    """Saldo acumulado (ingresos menos gastos desde el primer mes)"""
+    df = _meses_a_fechas(serie.reset_index()[["mes", "saldo"]])
+    return alt.Chart(df).mark_area(line=True, opacity=0.3).encode(
+        x=alt.X("mes:T", title="Mes", axis=alt.Axis(format="%Y-%m")),
+        y=alt.Y("saldo:Q", title="Saldo acumulado"),
+        tooltip=[alt.Tooltip("mes:T", format="%Y-%m"), alt.Tooltip("saldo:Q", format="$,.2f", title="Saldo")]
+    ).to_dict()
+
+
+def grafico_tendencias_categorias(tendencias):
+    """Una línea por categoría; `tendencias` es series.tendencias_categorias"""
+    df = _meses_a_fechas(tendencias.reset_index()).melt("mes", var_name="Categoría", value_name="Monto")
+    return alt.Chart(df).mark_line().encode(
+        x=alt.X("mes:T", title="Mes", axis=alt.Axis(format="%Y-%m")),
+        y=alt.Y("Monto:Q", title="Gasto (media móvil)"),
+        color=alt.Color("Categoría:N", scale=alt.Scale(scheme="category10")),
+        tooltip=[alt.Tooltip("mes:T", format="%Y-%m"), "Categoría:N", alt.Tooltip("Monto:Q", format="$,.2f")]
+    ).to_dict()
+
+
+def grafico_comparacion_anual(tabla):
+    """Una línea por año sobre los meses Ene..Dic; `tabla` es series.comparacion_anual"""
+    df = tabla.reset_index().melt("Año", var_name="Mes", value_name="Monto").dropna()
+    df["Año"] = df["Año"].astype(str)
+    return alt.Chart(df).mark_line(point=True).encode(
+        x=alt.X("Mes:O", sort=list(tabla.columns)),
+        y="Monto:Q",
+        color=alt.Color("Año:N"),
+        tooltip=["Año:N", "Mes:O", alt.Tooltip("Monto:Q", format="$,.2f")]
+    ).to_dict()
+
+
+# ======= Proyección a fin de mes =======
+def grafico_proyeccion(proyeccion):
+    """
+    Por categoría: gastado a la fecha (barra), proyección a fin de mes (punto)
+    con su banda, y el presupuesto (marca negra). `proyeccion` es pronostico.proyectar_mes.
+    """
+    df = proyeccion.reset_index().rename(columns={"categoria": "Categoría"})
+    x = alt.X("Categoría:N", sort=None)
+    tooltip = [
+        "Categoría:N",
+        alt.Tooltip("gastado:Q", format="$,.2f", title="Gastado"),
+        alt.Tooltip("proyeccion:Q", format="$,.2f", title="Proyección"),
+        alt.Tooltip("minimo:Q", format="$,.2f", title="Mínimo"),
+        alt.Tooltip("maximo:Q", format="$,.2f", title="Máximo"),
+        alt.Tooltip("presupuesto:Q", format="$,.2f", title="Presupuesto"),
+    ]
+    base = alt.Chart(df)
+    barras = base.mark_bar(opacity=0.6).encode(x=x, y=alt.Y("gastado:Q", title="Monto"), tooltip=tooltip)
+    banda = base.mark_rule(color="orange", strokeWidth=2).encode(x=x, y="minimo:Q", y2="maximo:Q")
+    puntos = base.mark_point(color="orange", filled=True, size=60).encode(x=x, y="proyeccion:Q", tooltip=tooltip)
+    limites = base.transform_filter(alt.datum.presupuesto > 0).mark_tick(
+        color="black", thickness=2, size=30
+    ).encode(x=x, y="presupuesto:Q")
+    return (barras + banda + puntos + limites).to_dict()
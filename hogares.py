@@ -0,0 +1,136 @@
+# archivo: hogares.py
+"""
+Varias familias en un mismo despliegue. Cada hogar tiene un identificador y su
+propia partición: un directorio bajo DIRECTORIO_HOGARES con sus archivos (JSON,
+diario, SQLite o particiones) o, en los modos con base SQL, su propio esquema.
+Sin identificador se usan los archivos de siempre en el directorio de trabajo.
+"""
+import os
+import re
+import threading
+import weakref
+from collections import OrderedDict
+
+DIRECTORIO_HOGARES = "hogares"
+
+# Hogares con almacenamiento abierto a la vez en el proceso; el menos usado se cierra
+LIMITE_HOGARES = 16
+
+# Letras, números, "-" y "_": el identificador es parte de rutas y nombres de esquema
+_IDENTIFICADOR = re.compile(r"[a-z0-9][a-z0-9_-]{0,62}")
+
+
+def validar_hogar(hogar):
+    """Identificador normalizado (minúsculas, sin espacios) o ValueError si no es válido"""
+    hogar = (hogar or "").strip().lower()
+    if hogar and not _IDENTIFICADOR.fullmatch(hogar):
+        raise ValueError(f"Identificador de hogar no válido: {hogar!r}")
+    return hogar
+
+
+def archivo_hogar(hogar, nombre):
+    """Ruta de `nombre` en la partición del hogar (creando su directorio)"""
+    if not hogar:
+        return nombre
+    directorio = os.path.join(DIRECTORIO_HOGARES, hogar)
+    os.makedirs(directorio, exist_ok=True)
+    return os.path.join(directorio, os.path.basename(nombre))
+
+
+def esquema_hogar(hogar):
+    """Esquema SQL del hogar; None deja las tablas en el esquema por omisión"""
+    return f"hogar_{hogar.replace('-', '_')}" if hogar else None
+
+
+# ======= Objetos abiertos por hogar =======
+class Prestamo:
+    """
+    Uso de un objeto de CacheLRU por una sesión. Mientras exista (o hasta
+    liberar()) la caché no cierra el objeto; si la sesión desaparece sin
+    liberarlo, se libera al recogerse.
+    """
+
+    def __init__(self, cache, clave, objeto):
+        self.clave = clave
+        self.objeto = objeto
+        self._liberar = weakref.finalize(self, cache._liberar, clave)
+
+    def liberar(self):
+        self._liberar()
+
+
+class CacheLRU:
+    """
+    Hasta `limite` objetos por clave. Al pasarse se cierran (cerrar()) los
+    usados hace más tiempo que ninguna sesión tiene prestados; si todos están en
+    uso, el límite se supera hasta que alguno se libere. Crear el objeto de un
+    hogar (abrir la base, importar los JSON) bloquea solo a quienes piden ese
+    mismo hogar.
+    """
+
+    def __init__(self, limite=LIMITE_HOGARES):
+        self.limite = limite
+        self._objetos = OrderedDict()
+        self._usos = {}
+        self._creando = {}
+        self._bloqueo = threading.Lock()
+
+    def _prestar(self, clave):
+        objeto = self._objetos.get(clave)
+        if objeto is not None:
+            self._objetos.move_to_end(clave)
+            self._usos[clave] = self._usos.get(clave, 0) + 1
+        return objeto
+
+    def _descartar_libres(self):
+        """Saca (sin cerrar) los objetos sobrantes sin préstamos, del más antiguo al más nuevo"""
+        libres = [clave for clave in self._objetos if clave not in self._usos]
+        sobrantes = len(self._objetos) - self.limite
+        return [self._objetos.pop(clave) for clave in libres[:max(sobrantes, 0)]]
+
+    def adquirir(self, clave, crear):
+        """Préstamo del objeto de `clave`, creándolo con crear() si no está abierto"""
+        with self._bloqueo:
+            objeto = self._prestar(clave)
+            if objeto is not None:
+                return Prestamo(self, clave, objeto)
+            bloqueo_clave = self._creando.setdefault(clave, threading.Lock())
+        with bloqueo_clave:
+            with self._bloqueo:
+                # Otra sesión pudo crearlo mientras se esperaba
+                objeto = self._prestar(clave)
+            if objeto is not None:
+                return Prestamo(self, clave, objeto)
+            try:
+                objeto = crear()
+            except BaseException:
+                with self._bloqueo:
+                    self._creando.pop(clave, None)
+                raise
+            with self._bloqueo:
+                self._objetos[clave] = objeto
+                self._creando.pop(clave, None)
+                self._prestar(clave)
+                descartados = self._descartar_libres()
+        _cerrar(descartados)
+        return Prestamo(self, clave, objeto)
+
+    def _liberar(self, clave):
+        with self._bloqueo:
+            usos = self._usos.get(clave, 0) - 1
+            if usos > 0:
+                self._usos[clave] = usos
+            else:
+                self._usos.pop(clave, None)
+            descartados = self._descartar_libres()
+        _cerrar(descartados)
+
+    def __len__(self):
+        return len(self._objetos)
+
+
+def _cerrar(objetos):
+    for objeto in objetos:
+        cerrar = getattr(objeto, "cerrar", None)
+        if cerrar is not None:
+            cerrar()
@@ -0,0 +1,244 @@
+# archivo: importacion.py
+import csv
+import io
+
+import pandas as pd
+
+from libro import COLUMNAS
+
+# Registros por bloque: la memoria del análisis depende de este tamaño, no del archivo
+TAMANO_BLOQUE = 5000
+
+# Nombres de columna habituales en los extractos, ya en minúsculas y sin tildes
+ALIAS_COLUMNAS = {
+    "fecha": ["fecha", "date", "fecha operacion", "fecha transaccion", "fecha valor", "posted date", "transaction date"],
+    "monto": ["monto", "importe", "valor", "amount"],
+    "debito": ["debito", "cargo", "retiro", "debit", "withdrawal"],
+    "credito": ["credito", "abono", "deposito", "credit", "deposit"],
+    "descripcion": ["descripcion", "concepto", "detalle", "referencia", "description", "memo", "name"],
+    "tipo": ["tipo", "type"],
+    "categoria": ["categoria", "category"],
+    "subcategoria": ["subcategoria", "subcategory"],
+    "medio_pago": ["medio de pago", "medio_pago", "medio pago"],
+}
+
+_TILDES = str.maketrans("áéíóúÁÉÍÓÚ", "aeiouAEIOU")
+
+
+def _nombre_columna(nombre):
+    return str(nombre).strip().lower().translate(_TILDES)
+
+
+# ======= Lectura por bloques =======
+def _abrir_texto(archivo):
+    """Acepta una ruta o un archivo subido (binario) y devuelve texto"""
+    if isinstance(archivo, str):
+        return open(archivo, "r", encoding="utf-8", errors="replace", newline="")
+    archivo.seek(0)
+    return io.TextIOWrapper(archivo, encoding="utf-8", errors="replace", newline="")
+
+
+def _separador(muestra):
+    """Separador detectado en la muestra; "," si no hay ninguno reconocible (una sola columna)"""
+    if not muestra:
+        return ","
+    try:
+        return csv.Sniffer().sniff(muestra, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+
+def leer_csv(archivo, tamano_bloque=TAMANO_BLOQUE):
+    """Bloques del CSV con las columnas renombradas a las del libro (las demás se descartan)"""
+    texto = _abrir_texto(archivo)
+    try:
+        muestra = texto.read(4096)
+        texto.seek(0)
+        separador = _separador(muestra)
+        for bloque in pd.read_csv(texto, sep=separador, dtype=str, chunksize=tamano_bloque, skipinitialspace=True):
+            renombres = {}
+            for columna in bloque.columns:
+                for destino, alias in ALIAS_COLUMNAS.items():
+                    if _nombre_columna(columna) in alias and destino not in renombres.values():
+                        renombres[columna] = destino
+            yield bloque[list(renombres)].rename(columns=renombres)
+    finally:
+        if isinstance(archivo, str):
+            texto.close()
+        else:
+            # El archivo subido sigue siendo de Streamlit: no se cierra con el envoltorio
+            texto.detach()
+
+
+def _etiquetas_ofx(texto, tamano=65536):
+    """Pares (etiqueta, valor) del OFX, leído en trozos; sirve para SGML (1.x) y XML (2.x)"""
+    resto = ""
+    while True:
+        trozo = texto.read(tamano)
+        resto += trozo
+        partes = resto.split("<")
+        # La última parte puede estar incompleta: se conserva para el siguiente trozo
+        resto = partes.pop() if trozo else ""
+        for parte in partes:
+            etiqueta, _, valor = parte.partition(">")
+            if etiqueta:
+                yield etiqueta.strip().upper(), valor.strip()
+        if not trozo:
+            if resto:
+                etiqueta, _, valor = resto.partition(">")
+                yield etiqueta.strip().upper(), valor.strip()
+            return
+
+
+def leer_ofx(archivo, tamano_bloque=TAMANO_BLOQUE):
+    """Bloques de movimientos <STMTTRN> del OFX con fecha, monto y descripción"""
+    texto = _abrir_texto(archivo)
+    try:
+        bloque, movimiento = [], None
+        for etiqueta, valor in _etiquetas_ofx(texto):
+            if etiqueta == "STMTTRN":
+                movimiento = {}
+            elif etiqueta == "/STMTTRN" and movimiento is not None:
+                bloque.append({
+                    "fecha": movimiento.get("DTPOSTED", "")[:8],
+                    "monto": movimiento.get("TRNAMT"),
+                    "descripcion": movimiento.get("NAME") or movimiento.get("MEMO"),
+                })
+                movimiento = None
+                if len(bloque) >= tamano_bloque:
+                    yield pd.DataFrame(bloque)
+                    bloque = []
+            elif movimiento is not None and not etiqueta.startswith("/"):
+                movimiento[etiqueta] = valor
+        if bloque:
+            yield pd.DataFrame(bloque)
+    finally:
+        if isinstance(archivo, str):
+            texto.close()
+        else:
+            texto.detach()
+
+
+def leer_extracto(archivo, formato, tamano_bloque=TAMANO_BLOQUE):
+    if formato == "csv":
+        return leer_csv(archivo, tamano_bloque)
+    if formato == "ofx":
+        return leer_ofx(archivo, tamano_bloque)
+    raise ValueError(f"Formato de extracto desconocido: {formato}")
+
+
+# ======= Normalización =======
+def _montos(serie):
+    """Texto de montos ("$1,234.56", "-12.50", "1.234,56") a número; lo ilegible queda NaN"""
+    limpio = serie.astype(str).str.replace(r"[^\d,.\-]", "", regex=True)
+    # Coma decimal: la coma va al final con uno o dos decimales
+    coma_decimal = limpio.str.contains(r",\d{1,2}$", regex=True)
+    limpio = limpio.where(
+        ~coma_decimal, limpio.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    ).str.replace(",", "", regex=False)
+    return pd.to_numeric(limpio, errors="coerce")
+
+
+def _fechas(serie, dia_primero):
+    """Fechas del bloque: AAAAMMDD (OFX), ISO y, para el resto, día/mes según `dia_primero`"""
+    serie = serie.astype(str).str.strip()
+    compactas = serie.str.fullmatch(r"\d{8}")
+    iso = serie.str.extract(r"^(\d{4}-\d{1,2}-\d{1,2})")[0]
+    fechas = pd.to_datetime(serie.where(compactas), format="%Y%m%d", errors="coerce")
+    if iso.notna().any():
+        fechas[iso.notna()] = pd.to_datetime(iso.dropna(), format="%Y-%m-%d", errors="coerce")
+    resto = ~compactas & iso.isna()
+    if resto.any():
+        # Formato inferido del bloque (rápido); solo las que fallan se analizan una a una
+        fechas[resto] = pd.to_datetime(serie[resto], dayfirst=dia_primero, errors="coerce")
+        fallidas = resto & fechas.isna()
+        if fallidas.any():
+            fechas[fallidas] = pd.to_datetime(serie[fallidas], dayfirst=dia_primero, errors="coerce", format="mixed")
+    return fechas
+
+
+def claves_registros(fecha, centavos, descripcion):
+    """Hash de (fecha, monto, descripción) para detectar movimientos repetidos"""
+    claves = pd.DataFrame({
+        "fecha": fecha.astype(str).to_numpy(),
+        "centavos": centavos.astype("int64").to_numpy(),
+        "descripcion": descripcion.astype(str).str.strip().str.lower().to_numpy(),
+    })
+    return pd.util.hash_pandas_object(claves, index=False)
+
+
+class ImportacionExtracto:
+    """
+    Normaliza bloques de un extracto al esquema del libro y descarta los
+    movimientos que ya existen (o se repiten en el archivo) con un índice hash
+    de (fecha, monto, descripción). Los nuevos se acumulan para una sola escritura.
+    """
+
+    def __init__(self, consultas, categoria, subcategoria, medio_pago, dia_primero=True, clasificador=None):
+        self.valores_defecto = {"categoria": categoria, "subcategoria": subcategoria, "medio_pago": medio_pago}
+        self.dia_primero = dia_primero
+        self.clasificador = clasificador
+        self.claves = {}
+        for tipo in COLUMNAS:
+            existentes = consultas.registros(tipo)
+            self.claves[tipo] = set(claves_registros(
+                existentes["fecha"].dt.strftime("%Y-%m-%d"), existentes["centavos"], existentes["descripcion"]
+            ))
+        self.nuevos = {tipo: [] for tipo in COLUMNAS}
+        self.leidos = 0
+        self.duplicados = 0
+        self.rechazados = 0
+
+    def _normalizar(self, bloque):
+        if "fecha" not in bloque or not {"monto", "credito", "debito"} & set(bloque.columns):
+            raise ValueError("no se encontraron columnas de fecha y monto (¿separador o encabezado distintos?)")
+        if "monto" in bloque:
+            montos = _montos(bloque["monto"])
+        else:
+            montos = _montos(bloque.get("credito", pd.Series(0, index=bloque.index))).fillna(0) \
+                - _montos(bloque.get("debito", pd.Series(0, index=bloque.index))).fillna(0)
+        fechas = _fechas(bloque["fecha"], self.dia_primero)
+        df = pd.DataFrame({
+            "fecha": fechas.dt.strftime("%Y-%m-%d"),
+            "centavos": (montos.abs() * 100).round(),
+            "descripcion": bloque.get("descripcion", pd.Series("", index=bloque.index)).fillna("").astype(str).str.strip(),
+        })
+        if "tipo" in bloque:
+            es_ingreso = bloque["tipo"].astype(str).str.lower().str.match(r"ingreso|credit|abono")
+        else:
+            es_ingreso = montos > 0
+        df["tipo"] = es_ingreso.map({True: "ingresos", False: "gastos"})
+        if self.clasificador is not None and "categoria" not in bloque:
+            # Categoría según gastos anteriores con descripciones parecidas; el medio de pago es el de la cuenta
+            sugerencias = self.clasificador.clasificar(df["descripcion"])
+            bloque = bloque.assign(categoria=sugerencias["categoria"], subcategoria=sugerencias["subcategoria"])
+        for columna, defecto in self.valores_defecto.items():
+            df[columna] = bloque[columna].fillna(defecto) if columna in bloque else defecto
+        valido = df["fecha"].notna() & df["centavos"].notna() & (df["centavos"] > 0) & (df["descripcion"] != "")
+        self.rechazados += int((~valido).sum())
+        df = df[valido].astype({"centavos": "int64"})
+        return df
+
+    def procesar(self, bloques):
+        for bloque in bloques:
+            self.leidos += len(bloque)
+            df = self._normalizar(bloque)
+            df["clave"] = claves_registros(df["fecha"], df["centavos"], df["descripcion"]).to_numpy()
+            for tipo, grupo in df.groupby("tipo"):
+                # Repetidos dentro del archivo y movimientos ya registrados
+                nuevos = grupo.drop_duplicates("clave")
+                nuevos = nuevos[~nuevos["clave"].isin(self.claves[tipo])]
+                self.duplicados += len(grupo) - len(nuevos)
+                self.claves[tipo].update(nuevos["clave"])
+                nuevos = nuevos.assign(monto=nuevos["centavos"] / 100)
+                columnas = [c for c in COLUMNAS[tipo] if c != "id"]
+                self.nuevos[tipo].extend(nuevos[columnas].to_dict("records"))
+        return self
+
+    @property
+    def total_nuevos(self):
+        return sum(len(r) for r in self.nuevos.values())
+
+    def operacion(self):
+        """Operación del libro que agrega todos los movimientos nuevos de una vez"""
+        return {"op": "agregar_lote", "registros": {t: r for t, r in self.nuevos.items() if r}}
@@ -0,0 +1,204 @@
+# archivo: instrumentacion.py
+"""
+Tramos cronometrados de cada rerun del dashboard. La medición es por hilo
+(Streamlit ejecuta cada sesión en el suyo) y está apagada salvo que se inicie un
+rerun con `activa=True`: apagada, tramo() devuelve siempre el mismo contexto vacío
+y medido() solo agrega una llamada.
+"""
+import contextlib
+import functools
+import json
+import threading
+import time
+from collections import deque
+
+# Reruns que se conservan por sesión para el panel y la exportación
+HISTORIAL_RERUNS = 20
+
+_NULO = contextlib.nullcontext()
+_local = threading.local()
+
+
+class Rerun:
+    """Tramos de un rerun: (nombre, inicio, duración, profundidad), en segundos desde su inicio"""
+
+    def __init__(self, etiqueta=""):
+        self.etiqueta = etiqueta
+        self.fecha = time.time()
+        self.inicio = time.perf_counter()
+        self.duracion = None
+        self.completo = False
+        self.tramos = []
+        self._abiertos = []
+        self._seccion = None
+
+    def _ahora(self):
+        return time.perf_counter() - self.inicio
+
+    def abrir(self, nombre):
+        tramo = [nombre, self._ahora(), None, len(self._abiertos)]
+        self._abiertos.append(tramo)
+        return tramo
+
+    def cerrar(self, tramo):
+        fin = self._ahora()
+        # Cierra también lo que quedó abierto adentro (una excepción a mitad de un tramo)
+        while self._abiertos:
+            abierto = self._abiertos.pop()
+            abierto[2] = fin - abierto[1]
+            self.tramos.append(tuple(abierto))
+            if abierto is tramo:
+                break
+
+    def seccion(self, nombre):
+        """Cierra la sección anterior y abre otra: marca partes del script sin indentarlas"""
+        if self._seccion is not None:
+            self.cerrar(self._seccion)
+        self._seccion = self.abrir(nombre)
+
+    def terminar(self, completo=True):
+        if self.duracion is None:
+            while self._abiertos:
+                self.cerrar(self._abiertos[0])
+            self.duracion = self._ahora()
+            self.completo = completo
+            self.tramos.sort(key=lambda t: (t[1], t[3]))
+
+    def a_dict(self):
+        return {
+            "etiqueta": self.etiqueta,
+            "fecha": self.fecha,
+            "duracion": self.duracion,
+            "completo": self.completo,
+            "tramos": [
+                {"nombre": n, "inicio": i, "duracion": d, "profundidad": p} for n, i, d, p in self.tramos
+            ],
+        }
+
+
+class _Tramo:
+    __slots__ = ("rerun", "nombre", "tramo")
+
+    def __init__(self, rerun, nombre):
+        self.rerun = rerun
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.tramo = self.rerun.abrir(self.nombre)
+        return self
+
+    def __exit__(self, *exc):
+        self.rerun.cerrar(self.tramo)
+        return False
+
+
+# ======= Medición en el hilo actual =======
+def iniciar_rerun(activa, etiqueta=""):
+    """Empieza a medir el rerun de este hilo, o deja la medición apagada"""
+    _local.rerun = Rerun(etiqueta) if activa else None
+    return _local.rerun
+
+
+def rerun_actual():
+    return getattr(_local, "rerun", None)
+
+
+def etiquetar(etiqueta):
+    """Nombre del rerun actual en el panel (la pestaña, que se conoce recién al leer el menú)"""
+    rerun = getattr(_local, "rerun", None)
+    if rerun is not None:
+        rerun.etiqueta = etiqueta
+
+
+def terminar_rerun():
+    """Cierra el rerun de este hilo y lo devuelve (None si no se medía)"""
+    rerun = rerun_actual()
+    if rerun is not None:
+        rerun.terminar()
+        _local.rerun = None
+    return rerun
+
+
+def tramo(nombre):
+    """Contexto que cronometra un bloque dentro del rerun actual"""
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        return _NULO
+    return _Tramo(rerun, nombre)
+
+
+def seccion(nombre):
+    rerun = getattr(_local, "rerun", None)
+    if rerun is not None:
+        rerun.seccion(nombre)
+
+
+def medido(nombre):
+    """Decorador: cada llamada es un tramo (con caché de Streamlit, aplicarlo por fuera mide también los aciertos)"""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            rerun = getattr(_local, "rerun", None)
+            if rerun is None:
+                return funcion(*args, **kwargs)
+            with _Tramo(rerun, nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+# ======= Historial y exportación =======
+class HistorialReruns:
+    """Últimos reruns medidos de una sesión"""
+
+    def __init__(self, limite=HISTORIAL_RERUNS):
+        self.reruns = deque(maxlen=limite)
+        self._pendiente = None
+
+    def iniciar(self, activa, etiqueta=""):
+        """
+        Inicia la medición del rerun. Un rerun anterior que no llegó a terminar
+        (st.rerun() o una excepción cortan el script) se guarda como incompleto.
+        """
+        if self._pendiente is not None:
+            self._pendiente.terminar(completo=False)
+            self.reruns.append(self._pendiente)
+        self._pendiente = iniciar_rerun(activa, etiqueta)
+
+    def terminar(self):
+        rerun = terminar_rerun()
+        if rerun is not None:
+            self.reruns.append(rerun)
+        self._pendiente = None
+        return rerun
+
+    def desglose(self, rerun):
+        """Filas (tramo, profundidad, ms, % del rerun) para mostrar"""
+        total = rerun.duracion or 1.0
+        return [
+            {"Tramo": "  " * p + n, "Inicio (ms)": i * 1000, "Duración (ms)": d * 1000, "% del rerun": d / total * 100}
+            for n, i, d, p in rerun.tramos
+        ]
+
+    def exportar_json(self):
+        return json.dumps([r.a_dict() for r in self.reruns], indent=2, ensure_ascii=False)
+
+    def exportar_chrome(self):
+        """Formato Trace Event (chrome://tracing, Perfetto): un hilo por rerun, tiempos en microsegundos"""
+        eventos = []
+        for numero, rerun in enumerate(self.reruns, 1):
+            base = rerun.fecha * 1e6
+            eventos.append({
+                "name": "thread_name", "ph": "M", "pid": 1, "tid": numero,
+                "args": {"name": f"rerun {numero} {rerun.etiqueta}".strip()},
+            })
+            eventos.append({
+                "name": rerun.etiqueta or "rerun", "ph": "X", "pid": 1, "tid": numero,
+                "ts": base, "dur": rerun.duracion * 1e6, "args": {"completo": rerun.completo},
+            })
+            for nombre, inicio, duracion, _ in rerun.tramos:
+                eventos.append({
+                    "name": nombre, "ph": "X", "pid": 1, "tid": numero,
+                    "ts": base + inicio * 1e6, "dur": duracion * 1e6,
+                })
+        return json.dumps({"traceEvents": eventos, "displayTimeUnit": "ms"})
@@ -0,0 +1,191 @@
+# archivo: libro.py
+import uuid
+
+import pandas as pd
+
+from instrumentacion import tramo
+
+COLUMNAS = {
+    "ingresos": ["id", "monto", "descripcion", "fecha"],
+    "gastos": ["id", "monto", "descripcion", "categoria", "subcategoria", "medio_pago", "fecha"],
+}
+
+# Árbol de categorías y subcategorías de gasto
+CATEGORIAS = {
+    "Alimentación": ["Supermercado", "Restaurantes", "Comida rápida", "Botellón Agua", "Tienda Barrio"],
+    "Vivienda": ["Hipoteca/Alquiler", "Servicios básicos", "Mantenimiento"],
+    "Transporte": ["Combustible", "Transporte público", "Mantenimiento vehículo", "Seguro Vehicular", "Matricula vehículo"],
+    "Salud": ["Medicinas", "Consultas médicas", "Seguros", "Peluquería/Estetica"],
+    "Educación": ["Colegiaturas", "Libros", "Cursos y talleres"],
+    "Entretenimiento": ["Cine", "Eventos", "Suscripciones", "Paseos Fin de Semana"],
+    "Ropa y Calzado": ["Ropa", "Calzado", "Accesorios"],
+    "Mascota y plantas": ["Alimentación", "Salud", "Accesorios", "Mantenimiento"],
+    "Ahorro e Inversiones": ["Ahorro", "Inversiones", "Fondo emergencias"],
+    "Otros": ["Varios", "Donaciones", "Regalos", "Padres"]
+}
+
+MEDIOS_PAGO = ["Efectivo", "Tarjeta de Crédito", "Transferencia"]
+
+# Columnas con pocos valores distintos: se guardan como `category`
+CATEGORICAS = ["categoria", "subcategoria", "medio_pago"]
+
+# Marca del archivo de datos guardado por columnas
+FORMATO_COLUMNAR = "columnar-1"
+
+
+# ======= Montos en centavos =======
+# Los centavos enteros están en lo guardado (columnas del archivo, tablas SQL) y en
+# la columna "centavos" del libro tipado, y con ellos se suma todo. Los registros en
+# memoria y las operaciones del diario siguen con "monto" decimal: siempre sale de
+# a_monto o se convierte con a_centavos al guardar, y la ida y vuelta es exacta.
+def a_centavos(monto):
+    """Monto en centavos enteros: las sumas son exactas y no acumulan error"""
+    return round(float(monto) * 100)
+
+
+def a_monto(centavos):
+    """Centavos -> monto decimal, solo para mostrar"""
+    return centavos / 100
+
+
+# ======= Identificadores de registro =======
+def nuevo_id():
+    """Identificador estable de un registro: no cambia al editar ni al borrar otros"""
+    return uuid.uuid4().hex
+
+
+def asignar_ids(data):
+    """Da un id a los registros que no lo tienen (libros anteriores); devuelve cuántos"""
+    asignados = 0
+    for tipo in COLUMNAS:
+        for registro in data.get(tipo, []):
+            if not registro.get("id"):
+                registro["id"] = nuevo_id()
+                asignados += 1
+    return asignados
+
+
+def clave_mes(mes):
+    """"2025-09" -> 202509, la clave entera con la que se indexan los meses"""
+    return int(mes[:4]) * 100 + int(mes[5:7])
+
+
+def tipar_registros(df, tipo):
+    """
+    Convierte un DataFrame de registros a los tipos del libro: centavos int64
+    (y el monto derivado para mostrar), fecha datetime64, mes como periodo más
+    su clave entera y categóricas. El índice es el id de cada registro.
+    """
+    if "centavos" in df:
+        centavos = df["centavos"].astype("int64")
+    else:
+        centavos = (pd.to_numeric(df["monto"]) * 100).round().astype("int64")
+    df = df.reindex(columns=COLUMNAS[tipo])
+    df["centavos"] = centavos
+    df["monto"] = centavos / 100
+    with tramo(f"libro: fechas y meses ({tipo})"):
+        df["fecha"] = pd.to_datetime(df["fecha"], format="%Y-%m-%d")
+        df["mes"] = df["fecha"].dt.to_period("M")
+        df["clave_mes"] = (df["fecha"].dt.year * 100 + df["fecha"].dt.month).astype("int32")
+    for columna in CATEGORICAS:
+        if columna in df:
+            df[columna] = df[columna].astype("category")
+    df.index = pd.Index(df["id"].to_numpy())
+    return df
+
+
+# ======= Formato columnar en disco =======
+def _codificar_categorica(valores):
+    """Diccionario de valores distintos más un código por registro"""
+    codigos = {}
+    return {
+        "codigos": [codigos.setdefault(v, len(codigos)) for v in valores],
+        "valores": list(codigos),
+    }
+
+
+def codificar_columnar(data):
+    """
+    Libro por columnas: ids, montos en centavos, fechas como enteros AAAAMMDD y
+    las categóricas como diccionario. Evita repetir las claves de cada registro.
+    """
+    contenido = {"formato": FORMATO_COLUMNAR}
+    for tipo, columnas in COLUMNAS.items():
+        registros = data.get(tipo, [])
+        bloque = {
+            "centavos": [a_centavos(r["monto"]) for r in registros],
+            "fecha": [int(r["fecha"].replace("-", "")) for r in registros],
+        }
+        for columna in columnas:
+            if columna in bloque or columna == "monto":
+                continue
+            valores = [r.get(columna) for r in registros]
+            bloque[columna] = _codificar_categorica(valores) if columna in CATEGORICAS else valores
+        contenido[tipo] = bloque
+    return contenido
+
+
+def decodificar_columnar(contenido):
+    data = {}
+    for tipo, columnas in COLUMNAS.items():
+        bloque = contenido[tipo]
+        valores = {
+            "monto": [a_monto(c) for c in bloque["centavos"]],
+            "fecha": [f"{f // 10000:04d}-{f // 100 % 100:02d}-{f % 100:02d}" for f in bloque["fecha"]],
+        }
+        for columna in columnas:
+            if columna not in valores:
+                columna_guardada = bloque[columna]
+                if isinstance(columna_guardada, dict):
+                    columna_guardada = [columna_guardada["valores"][i] for i in columna_guardada["codigos"]]
+                valores[columna] = columna_guardada
+        # Los campos vacíos no se agregan, igual que en los registros originales
+        data[tipo] = [
+            {c: v for c, v in zip(columnas, fila) if v is not None}
+            for fila in zip(*(valores[c] for c in columnas))
+        ]
+    return data
+
+
+def leer_libro(contenido):
+    """Datos del libro desde el contenido del archivo, en formato columnar o por registros"""
+    if contenido.get("formato") == FORMATO_COLUMNAR:
+        return decodificar_columnar(contenido)
+    return {"ingresos": contenido.get("ingresos", []), "gastos": contenido.get("gastos", [])}
+
+
+class LibroContable:
+    """
+    DataFrames tipados del libro, construidos una sola vez por versión de los
+    datos. Las pestañas reciben vistas por mes en lugar de volver a convertir
+    fechas y montos en cada rerun.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._frames = {}
+        self._posiciones = {}
+        self._por_id = {}
+
+    def frame(self, tipo):
+        if tipo not in self._frames:
+            with tramo(f"libro: DataFrame ({tipo})"):
+                df = tipar_registros(pd.DataFrame(self.data[tipo], columns=COLUMNAS[tipo]), tipo)
+            self._frames[tipo] = df
+            # Posiciones de cada mes, para entregar un mes sin recorrer todo el libro
+            self._posiciones[tipo] = df.groupby("clave_mes").indices
+        return self._frames[tipo]
+
+    def registros(self, tipo, mes=None):
+        df = self.frame(tipo)
+        if mes is None:
+            return df
+        posiciones = self._posiciones[tipo].get(clave_mes(mes))
+        return df.iloc[posiciones] if posiciones is not None else df.iloc[0:0]
+
+    def registro(self, tipo, id_registro):
+        """Registro por id (tabla hash construida una vez por versión) o None"""
+        if tipo not in self._por_id:
+            self._por_id[tipo] = {r["id"]: r for r in self.data[tipo]}
+        registro = self._por_id[tipo].get(id_registro)
+        return dict(registro) if registro is not None else None
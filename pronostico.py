@@ -0,0 +1,116 @@
+# archivo: pronostico.py
+import numpy as np
+import pandas as pd
+
+# Meses completos anteriores que forman el perfil de gasto diario
+MESES_HISTORIA = 12
+# Banda de confianza: percentiles de los escenarios de los meses históricos
+PERCENTILES_BANDA = (10, 90)
+# El ritmo del mes en curso ajusta lo que falta por gastar, dentro de estos límites
+LIMITES_RITMO = (0.5, 2.0)
+
+
+def meses_historia(mes, disponibles=None, cantidad=MESES_HISTORIA):
+    """
+    Los `cantidad` meses completos anteriores a `mes`, del más antiguo al más
+    reciente. Con `disponibles` (los meses con registros) quedan solo los que el
+    libro cubre: un mes sin registros no es un mes en que no se gastó nada.
+    """
+    periodo = pd.Period(mes, freq="M")
+    meses = [(periodo - i).strftime("%Y-%m") for i in range(cantidad, 0, -1)]
+    if disponibles is not None:
+        disponibles = set(disponibles)
+        meses = [m for m in meses if m in disponibles]
+    return meses
+
+
+def avance_mes(mes, hoy):
+    """Fracción transcurrida del mes al día `hoy`: 0 si aún no empieza, 1 si ya terminó"""
+    periodo = pd.Period(mes, freq="M")
+    if hoy < periodo.start_time:
+        return 0.0
+    if hoy > periodo.end_time:
+        return 1.0
+    return hoy.day / periodo.days_in_month
+
+
+def historia_gastos(consultas, meses):
+    """Fecha, categoría y centavos de los gastos de los meses indicados (cada mes por separado)"""
+    partes = [consultas.registros("gastos", mes)[["fecha", "categoria", "centavos"]] for mes in meses]
+    partes = [p for p in partes if not p.empty]
+    if not partes:
+        return pd.DataFrame({"fecha": pd.Series(dtype="datetime64[ns]"), "categoria": [], "centavos": []})
+    return pd.concat(partes, ignore_index=True).astype({"categoria": str})
+
+
+# ======= Proyección =======
+def perfiles_gasto(historia, meses, categorias, avance):
+    """
+    Matrices categoría × mes histórico (centavos): lo gastado hasta la misma
+    fracción del mes que `avance` y lo gastado después. La fracción (día / días
+    del mes) compara bien meses de distinto largo.
+    """
+    hasta = np.zeros((len(categorias), len(meses)))
+    despues = np.zeros((len(categorias), len(meses)))
+    if historia.empty:
+        return hasta, despues
+    fechas = historia["fecha"]
+    fila = pd.Categorical(historia["categoria"], categories=categorias).codes
+    columna = pd.Categorical(fechas.dt.strftime("%Y-%m"), categories=meses).codes
+    validos = (fila >= 0) & (columna >= 0)
+    antes = (fechas.dt.day / fechas.dt.days_in_month).to_numpy() <= avance
+    centavos = historia["centavos"].to_numpy(dtype=float)
+    np.add.at(hasta, (fila[validos & antes], columna[validos & antes]), centavos[validos & antes])
+    np.add.at(despues, (fila[validos & ~antes], columna[validos & ~antes]), centavos[validos & ~antes])
+    return hasta, despues
+
+
+def proyectar_mes(historia, meses, gastado, presupuesto, avance):
+    """
+    Proyección a fin de mes de todas las categorías a la vez. Cada mes histórico
+    da un escenario: lo gastado hasta hoy más lo que ese mes gastó después de
+    esta fecha, escalado por el ritmo actual frente al histórico. La proyección
+    es el promedio y la banda, los percentiles de los escenarios. `meses` son solo
+    los que el libro cubre (ver meses_historia); sin ninguno, o sin gastos en
+    ellos, se extrapola linealmente. `gastado` y `presupuesto` son Series categoría -> monto;
+    `avance` (ver avance_mes) debe estar entre 0 y 1, sin incluir el 0.
+    Devuelve un DataFrame por categoría con montos en pesos.
+    """
+    categorias = sorted(set(gastado.index) | set(presupuesto.index) | set(historia["categoria"]))
+    actual = gastado.reindex(categorias, fill_value=0.0).to_numpy(dtype=float) * 100
+    limite = presupuesto.reindex(categorias, fill_value=0.0).to_numpy(dtype=float) * 100
+    hasta, despues = perfiles_gasto(historia, meses, categorias, avance)
+
+    if historia.empty or not meses:
+        escenarios = (actual / avance)[:, None]
+    else:
+        tipico = hasta.mean(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ritmo = np.where(tipico > 0, actual / tipico, 1.0)
+        ritmo = np.clip(ritmo, *LIMITES_RITMO)
+        escenarios = actual[:, None] + despues * ritmo[:, None]
+
+    minimo, maximo = np.percentile(escenarios, PERCENTILES_BANDA, axis=1)
+    with np.errstate(invalid="ignore"):
+        probabilidad = np.where(limite > 0, (escenarios > limite[:, None]).mean(axis=1), np.nan)
+    return pd.DataFrame(
+        {
+            "gastado": actual / 100,
+            "presupuesto": limite / 100,
+            "proyeccion": escenarios.mean(axis=1) / 100,
+            "minimo": minimo / 100,
+            "maximo": maximo / 100,
+            "probabilidad_exceso": probabilidad,
+        },
+        index=pd.Index(categorias, name="categoria"),
+    )
+
+
+def en_riesgo(proyeccion):
+    """Categorías aún dentro del presupuesto cuya proyección lo supera"""
+    con_presupuesto = proyeccion["presupuesto"] > 0
+    return proyeccion[
+        con_presupuesto
+        & (proyeccion["gastado"] <= proyeccion["presupuesto"])
+        & (proyeccion["proyeccion"] > proyeccion["presupuesto"])
+    ]
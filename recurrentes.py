@@ -0,0 +1,184 @@
+# archivo: recurrentes.py
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from almacenamiento import escribir_json_atomico
+from libro import COLUMNAS, nuevo_id
+
+FRECUENCIAS = ["mensual", "quincenal", "semanal", "anual"]
+
+# Quincenas: el día 15 y el último del mes
+DIAS_QUINCENA = [15, 31]
+
+COLUMNAS_OCURRENCIAS = ["regla", "fecha", "tipo", "monto", "descripcion", "categoria", "subcategoria", "medio_pago"]
+
+# Los ids de las ocurrencias se derivan de (regla, fecha): materializar dos veces
+# la misma fecha da el mismo id y se detecta antes de escribir
+_ESPACIO_IDS = uuid.UUID("6f1c3a52-2b7e-4f0a-9d51-8a3e2c7b4d10")
+
+
+def id_ocurrencia(id_regla, fecha):
+    return uuid.uuid5(_ESPACIO_IDS, f"{id_regla}/{fecha}").hex
+
+
+# ======= Generación de fechas =======
+# Aritmética de datetime64 de NumPy: una regla genera décadas de fechas sin
+# recorrerlas una a una.
+def _dia(valor):
+    return np.datetime64(pd.Timestamp(valor).date(), "D")
+
+
+def _dia_en_meses(meses, dia):
+    """El día `dia` de cada mes (datetime64[M]); el último si el mes es más corto"""
+    inicio = meses.astype("datetime64[D]")
+    largo = ((meses + 1).astype("datetime64[D]") - inicio).astype(int)
+    return inicio + (np.minimum(dia, largo) - 1)
+
+
+def fechas_regla(regla, desde, hasta):
+    """Fechas (datetime64[D]) de la regla entre `desde` y `hasta`, ambos incluidos"""
+    origen = _dia(regla["desde"])
+    inicio = max(origen, _dia(desde))
+    fin = _dia(hasta)
+    if regla.get("hasta"):
+        fin = min(fin, _dia(regla["hasta"]))
+    if inicio > fin:
+        return np.array([], dtype="datetime64[D]")
+    frecuencia = regla["frecuencia"]
+    if frecuencia == "semanal":
+        # Cada 7 días contados desde el inicio de la regla
+        semanas = -(-(inicio - origen).astype(int) // 7)
+        fechas = np.arange(origen + 7 * semanas, fin + 1, 7)
+    elif frecuencia == "anual":
+        meses = np.arange(origen.astype("datetime64[M]"), fin.astype("datetime64[M]") + 1, 12)
+        fechas = _dia_en_meses(meses, pd.Timestamp(regla["desde"]).day)
+    elif frecuencia in ("mensual", "quincenal"):
+        meses = np.arange(inicio.astype("datetime64[M]"), fin.astype("datetime64[M]") + 1)
+        dias = [int(regla["dia"])] if frecuencia == "mensual" else DIAS_QUINCENA
+        fechas = np.unique(np.concatenate([_dia_en_meses(meses, dia) for dia in dias]))
+    else:
+        raise ValueError(f"Frecuencia desconocida: {frecuencia}")
+    return fechas[(fechas >= inicio) & (fechas <= fin)]
+
+
+def ocurrencias(reglas, desde, hasta):
+    """
+    Movimientos que generan las reglas entre dos fechas, calculados al pedirlos:
+    nada de esto se guarda hasta materializarlo. Un DataFrame con el esquema del
+    libro (sin id, ver con_ids) más la regla de origen; el monto es el de la regla.
+    """
+    if not reglas:
+        return pd.DataFrame(columns=COLUMNAS_OCURRENCIAS)
+    fechas = [fechas_regla(regla, desde, hasta) for regla in reglas]
+    posiciones = np.repeat(np.arange(len(reglas)), [len(f) for f in fechas])
+    tabla = pd.DataFrame(reglas).rename(columns={"id": "regla"}).reindex(columns=COLUMNAS_OCURRENCIAS)
+    df = tabla.iloc[posiciones].reset_index(drop=True)
+    df["fecha"] = np.datetime_as_string(np.concatenate(fechas), unit="D")
+    return df.sort_values("fecha", kind="stable", ignore_index=True)
+
+
+def con_ids(ocurrencias_df):
+    """Agrega a cada ocurrencia su id estable (solo hace falta al materializar)"""
+    return ocurrencias_df.assign(
+        id=[id_ocurrencia(r, f) for r, f in zip(ocurrencias_df["regla"], ocurrencias_df["fecha"])]
+    )
+
+
+def pendientes(reglas, hasta):
+    """Ocurrencias hasta `hasta` posteriores a lo ya materializado de cada regla"""
+    df = ocurrencias(reglas, min((r["desde"] for r in reglas), default=hasta), hasta)
+    materializada = df["regla"].map({r["id"]: r.get("materializada_hasta") or "" for r in reglas})
+    return df[df["fecha"] > materializada]
+
+
+def operacion_lote(ocurrencias_df):
+    """Operación agregar_lote con las ocurrencias (ver con_ids)"""
+    registros = {}
+    for tipo, grupo in ocurrencias_df.groupby("tipo"):
+        registros[tipo] = grupo[COLUMNAS[tipo]].to_dict("records")
+    return {"op": "agregar_lote", "registros": registros}
+
+
+def totales_por_mes(ocurrencias_df):
+    """Centavos de ingresos y gastos por mes, con la forma de consultas.totales_por_mes()"""
+    if ocurrencias_df.empty:
+        return pd.DataFrame({"mes": [], "ingresos": [], "gastos": []}).astype({"ingresos": "int64", "gastos": "int64"})
+    centavos = (ocurrencias_df["monto"].astype(float) * 100).round().astype("int64")
+    tabla = pd.DataFrame({
+        "mes": ocurrencias_df["fecha"].str[:7], "tipo": ocurrencias_df["tipo"], "centavos": centavos
+    }).pivot_table(index="mes", columns="tipo", values="centavos", aggfunc="sum", fill_value=0)
+    tabla = tabla.reindex(columns=["ingresos", "gastos"], fill_value=0).astype("int64")
+    tabla.columns.name = None
+    return tabla.reset_index()
+
+
+def sumar_totales(*totales):
+    """Suma tablas de totales_por_mes (las del libro y las de ocurrencias futuras)"""
+    partes = [t.set_index("mes") for t in totales if not t.empty]
+    if not partes:
+        return totales[0]
+    suma = pd.concat(partes).groupby(level=0).sum().astype("int64").sort_index()
+    return suma.reset_index()
+
+
+# ======= Reglas guardadas =======
+class ReglasRecurrentes:
+    """
+    Reglas de movimientos recurrentes en un archivo JSON junto al libro. Cada regla:
+    tipo, descripcion, monto, frecuencia, dia (mensual), desde, hasta (opcional),
+    categoría, subcategoría y medio de pago (gastos), y hasta qué fecha se materializó.
+    """
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self._bloqueo = threading.RLock()
+
+    def cargar(self):
+        if os.path.exists(self.archivo):
+            with open(self.archivo, "r") as f:
+                return json.load(f)
+        return []
+
+    def guardar(self, reglas):
+        with self._bloqueo:
+            escribir_json_atomico(self.archivo, reglas)
+
+    def agregar(self, regla):
+        if regla["frecuencia"] not in FRECUENCIAS:
+            raise ValueError(f"Frecuencia desconocida: {regla['frecuencia']}")
+        regla.setdefault("id", nuevo_id())
+        with self._bloqueo:
+            reglas = self.cargar()
+            reglas.append(regla)
+            self.guardar(reglas)
+        return regla
+
+    def eliminar(self, ids):
+        """Quita las reglas; lo que ya se materializó queda en el libro"""
+        with self._bloqueo:
+            self.guardar([r for r in self.cargar() if r["id"] not in set(ids)])
+
+    def materializar(self, registrar, hasta, existe):
+        """
+        Registra en una sola operación las ocurrencias pendientes hasta `hasta` y
+        marca las reglas. `existe(tipo, id)` descarta las que ya están en el libro,
+        por si una materialización anterior se cortó antes de marcar las reglas.
+        Devuelve cuántos movimientos se registraron.
+        """
+        hasta = pd.Timestamp(hasta).strftime("%Y-%m-%d")
+        with self._bloqueo:
+            reglas = self.cargar()
+            nuevas = con_ids(pendientes(reglas, hasta))
+            if not nuevas.empty:
+                nuevas = nuevas[[not existe(t, i) for t, i in zip(nuevas["tipo"], nuevas["id"])]]
+            if not nuevas.empty:
+                registrar(operacion_lote(nuevas))
+            for regla in reglas:
+                regla["materializada_hasta"] = max(regla.get("materializada_hasta") or "", hasta)
+            self.guardar(reglas)
+        return len(nuevas)
@@ -0,0 +1,305 @@
+# archivo: reportes.py
+"""
+Cálculos de las pestañas Balance y Reporte Detallado, sin Streamlit: reciben las
+consultas de un almacenamiento y devuelven montos y DataFrames listos para mostrar.
+Como línea de comandos genera reportes de uno o muchos libros en paralelo:
+
+    python reportes.py hogares/*/presupuesto_familiar.json --mes 2025-09 --salida reportes/
+    python reportes.py hogares/*/presupuesto_familiar.json --anio 2025 --procesos 8
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from libro import CATEGORIAS, a_monto
+from pronostico import avance_mes, en_riesgo, historia_gastos, meses_historia, proyectar_mes
+
+# Árbol completo (categoría, subcategoría) en el orden de CATEGORIAS, para reindexar agregados
+INDICE_SUBCATEGORIAS = pd.MultiIndex.from_tuples(
+    [(cat, sub) for cat, subs in CATEGORIAS.items() for sub in subs],
+    names=["categoria", "subcategoria"]
+)
+
+# Tasa de ahorro (% de los ingresos) por debajo de la cual se recomienda recortar, y por encima de la cual se felicita
+AHORRO_BAJO = 10
+AHORRO_BUENO = 20
+
+
+# ======= Balance =======
+def totales(consultas, mes=None):
+    """(ingresos, gastos, balance) en pesos, sumados en centavos exactos"""
+    centavos_ingresos = consultas.total_centavos("ingresos", mes)
+    centavos_gastos = consultas.total_centavos("gastos", mes)
+    return a_monto(centavos_ingresos), a_monto(centavos_gastos), a_monto(centavos_ingresos - centavos_gastos)
+
+
+def proyectar_gastos(consultas, mes, presupuesto_mes, hoy):
+    """Proyección a fin de mes por categoría si `mes` está en curso el día `hoy`; None para meses cerrados o futuros"""
+    avance = avance_mes(mes, hoy)
+    if not 0 < avance < 1:
+        return None
+    meses = meses_historia(mes, consultas.meses_disponibles())
+    gastado = consultas.gastos_por(["categoria"], mes).set_index("categoria")["monto"]
+    return proyectar_mes(
+        historia_gastos(consultas, meses), meses, gastado, pd.Series(presupuesto_mes, dtype=float), avance
+    )
+
+
+def gastos_subcategorias(consultas, mes, presupuesto_mes):
+    """
+    Gastado por subcategoría sobre el árbol completo (0 si no hubo gastos), con el
+    presupuesto de su categoría y si la categoría lo excede. None sin gastos en el mes.
+    """
+    gastos_subcat = consultas.gastos_por(["categoria", "subcategoria"], mes)
+    if gastos_subcat.empty:
+        return None
+    # Una sola pasada: reindexar contra el árbol completo y cruzar el presupuesto por categoría
+    subcat_df = (
+        gastos_subcat.set_index(["categoria", "subcategoria"])["monto"]
+        .reindex(INDICE_SUBCATEGORIAS, fill_value=0.0)
+        .astype(float)
+        .reset_index()
+    )
+    subcat_df.columns = ["Categoría", "Subcategoría", "Gastado"]
+    presupuesto_cat = pd.Series(presupuesto_mes, dtype=float)
+    subcat_df["Presupuesto"] = subcat_df["Categoría"].map(presupuesto_cat).fillna(0.0)
+    subcat_df["Excedido"] = subcat_df["Gastado"] > subcat_df["Presupuesto"]
+    return subcat_df
+
+
+def balance_mes(consultas, mes, presupuesto_mes, hoy):
+    """Todo lo que muestra la pestaña Balance para un mes"""
+    total_ingresos, total_gastos, balance = totales(consultas, mes)
+    proyeccion = proyectar_gastos(consultas, mes, presupuesto_mes, hoy)
+    return {
+        "mes": mes,
+        "total_ingresos": total_ingresos,
+        "total_gastos": total_gastos,
+        "balance": balance,
+        "proyeccion": proyeccion,
+        "en_riesgo": en_riesgo(proyeccion) if proyeccion is not None else None,
+        "subcategorias": gastos_subcategorias(consultas, mes, presupuesto_mes),
+    }
+
+
+# ======= Reporte detallado =======
+def analisis_categorias(gasto_por_categoria, presupuesto_mes):
+    """Presupuestado, gastado, diferencia, % usado y estado de cada categoría del árbol"""
+    analisis_cat = []
+    for categoria in CATEGORIAS:
+        gasto_cat = gasto_por_categoria.get(categoria, 0.0)
+        presup_cat = presupuesto_mes.get(categoria, 0.0)
+        analisis_cat.append({
+            "Categoría": categoria,
+            "Presupuestado": presup_cat,
+            "Gastado": gasto_cat,
+            "Diferencia": presup_cat - gasto_cat,
+            "% Usado": (gasto_cat / presup_cat * 100) if presup_cat > 0 else 0,
+            "Estado": "🔴 Excedido" if gasto_cat > presup_cat else "🟢 Dentro" if gasto_cat > 0 else "⚪ Sin gastos",
+        })
+    return pd.DataFrame(analisis_cat)
+
+
+def resumen_por(consultas, columna, titulo, mes=None):
+    """Monto total y porcentaje de los gastos agrupados por `columna` (subcategoria o medio_pago)"""
+    resumen = consultas.gastos_por([columna], mes)
+    resumen.columns = [titulo, "Monto Total"]
+    resumen["Porcentaje"] = (resumen["Monto Total"] / resumen["Monto Total"].sum() * 100).round(2)
+    return resumen
+
+
+def porcentajes_categorias(gastos_cat):
+    """Total, porcentaje y etiqueta por categoría a partir de gastos_por(["categoria"])"""
+    df = gastos_cat.copy()
+    df.columns = ["Categoría", "Total"]
+    df["Porcentaje"] = (df["Total"] / df["Total"].sum() * 100).round(1)
+    df["Etiqueta"] = (
+        df["Categoría"] + "\n" + df["Porcentaje"].astype(str) + "%\n$"
+        + df["Total"].map("{:,.0f}".format)
+    )
+    return df
+
+
+def alertas(total_ingresos, total_gastos, balance, gasto_por_categoria, presupuesto_mes, proyeccion=None):
+    """Alertas y recomendaciones del reporte, en el texto (Markdown) que muestra el dashboard"""
+    lista = []
+    if balance < 0:
+        lista.append("🔴 **ALERTA CRÍTICA**: Gastos superan los ingresos")
+
+    if presupuesto_mes:
+        categorias_excedidas = []
+        for categoria in CATEGORIAS:
+            gasto_cat = gasto_por_categoria.get(categoria, 0)
+            presup_cat = presupuesto_mes.get(categoria, 0.0)
+            if gasto_cat > presup_cat and presup_cat > 0:
+                categorias_excedidas.append(f"{categoria} (${gasto_cat-presup_cat:,.2f} sobre presupuesto)")
+        if categorias_excedidas:
+            lista.append(f"🟡 **Categorías con presupuesto excedido**: {', '.join(categorias_excedidas)}")
+
+        # Antes de exceder: categorías del mes en curso cuya proyección al cierre supera el presupuesto
+        if proyeccion is not None:
+            en_camino = [
+                f"{categoria} (proyección ${fila['proyeccion']:,.2f} de ${fila['presupuesto']:,.2f}, "
+                f"{fila['probabilidad_exceso']:.0%} de probabilidad)"
+                for categoria, fila in en_riesgo(proyeccion).iterrows()
+            ]
+            if en_camino:
+                lista.append(f"🟠 **Se proyecta exceder el presupuesto**: {', '.join(en_camino)}")
+
+    if total_ingresos > 0:
+        porcentaje_ahorro = ((total_ingresos - total_gastos) / total_ingresos) * 100
+        if porcentaje_ahorro < AHORRO_BAJO:
+            lista.append("🟡 **Recomendación**: Tasa de ahorro baja, considere reducir gastos opcionales")
+        elif porcentaje_ahorro > AHORRO_BUENO:
+            lista.append("🟢 **Excelente**: Mantiene una buena tasa de ahorro")
+    return lista
+
+
+def reporte(consultas, mes, presupuesto_mes, hoy):
+    """
+    Todo lo que muestra Reporte Detallado: un mes ("AAAA-MM") o el libro completo
+    (mes None, sin presupuesto). Los DataFrames de categorías y resúmenes son None
+    si no hay gastos; el análisis por categorías, también si no hay presupuesto.
+    """
+    total_ingresos, total_gastos, balance = totales(consultas, mes)
+    gastos_cat = consultas.gastos_por(["categoria"], mes)
+    gasto_por_categoria = gastos_cat.set_index("categoria")["monto"].to_dict()
+    hay_gastos = not gastos_cat.empty
+    proyeccion = proyectar_gastos(consultas, mes, presupuesto_mes, hoy) if mes and presupuesto_mes else None
+    return {
+        "mes": mes,
+        "total_ingresos": total_ingresos,
+        "total_gastos": total_gastos,
+        "total_presupuesto": sum(presupuesto_mes.values()) if presupuesto_mes else 0.0,
+        "balance": balance,
+        "categorias": porcentajes_categorias(gastos_cat) if hay_gastos else None,
+        "analisis": analisis_categorias(gasto_por_categoria, presupuesto_mes) if hay_gastos and presupuesto_mes else None,
+        "subcategorias": resumen_por(consultas, "subcategoria", "Subcategoría", mes) if hay_gastos else None,
+        "medios_pago": (
+            resumen_por(consultas, "medio_pago", "Medio de Pago", mes).sort_values("Monto Total", ascending=False)
+            if hay_gastos else None
+        ),
+        "alertas": alertas(total_ingresos, total_gastos, balance, gasto_por_categoria, presupuesto_mes, proyeccion),
+    }
+
+
+def reporte_anual(consultas, anio, presupuesto, hoy):
+    """Reporte de cada mes del año con registros, más los totales del año"""
+    meses = sorted(m for m in consultas.meses_disponibles() if m.startswith(f"{anio}-"))
+    mensuales = [reporte(consultas, mes, presupuesto.get(mes, {}), hoy) for mes in meses]
+    total_ingresos = sum(r["total_ingresos"] for r in mensuales)
+    total_gastos = sum(r["total_gastos"] for r in mensuales)
+    gastos_cat = pd.concat([consultas.gastos_por(["categoria"], mes) for mes in meses] or [pd.DataFrame()])
+    if not gastos_cat.empty:
+        gastos_cat = gastos_cat.groupby("categoria", observed=True, as_index=False)["monto"].sum()
+    return {
+        "anio": anio,
+        "total_ingresos": total_ingresos,
+        "total_gastos": total_gastos,
+        "balance": total_ingresos - total_gastos,
+        "categorias": porcentajes_categorias(gastos_cat) if not gastos_cat.empty else None,
+        "meses": mensuales,
+    }
+
+
+# ======= Salida =======
+def a_json(valor):
+    """Reporte con DataFrames como listas de registros, serializable con json.dumps"""
+    if isinstance(valor, dict):
+        return {clave: a_json(v) for clave, v in valor.items()}
+    if isinstance(valor, list):
+        return [a_json(v) for v in valor]
+    if isinstance(valor, pd.DataFrame):
+        df = valor.reset_index() if valor.index.name else valor
+        return json.loads(df.to_json(orient="records", force_ascii=False))
+    if hasattr(valor, "item"):
+        return valor.item()
+    return valor
+
+
+# ======= Línea de comandos =======
+def generar(tarea):
+    """
+    Reporte de un libro. Se ejecuta en un proceso del pool: recibe y devuelve solo
+    datos simples, y un error queda en el resultado en lugar de cortar el lote.
+    El libro se abre en solo lectura: un reporte nunca modifica sus archivos.
+    """
+    from almacenamiento import ConsultasMemoria, cargar_libro
+
+    libro = tarea["libro"]
+    try:
+        presupuesto_file = os.path.join(os.path.dirname(libro), tarea["presupuesto"])
+        data, presupuesto = cargar_libro(tarea["modo"], libro, presupuesto_file)
+        consultas = ConsultasMemoria(lambda: data)
+        hoy = pd.Timestamp(tarea["hoy"])
+        if tarea["anio"]:
+            contenido = reporte_anual(consultas, tarea["anio"], presupuesto, hoy)
+        else:
+            mes = tarea["mes"]
+            contenido = reporte(consultas, mes, presupuesto.get(mes, {}) if mes else {}, hoy)
+        return {"libro": libro, "reporte": a_json(contenido)}
+    except Exception as e:
+        return {"libro": libro, "error": f"{type(e).__name__}: {e}"}
+
+
+def _nombre_salida(libro, periodo):
+    base = os.path.splitext(os.path.relpath(libro))[0].replace(os.sep, "_").strip("._")
+    return f"{base}_{periodo}.json"
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Reportes de uno o muchos libros, sin la interfaz")
+    parser.add_argument("libros", nargs="+", help="archivos de datos (presupuesto_familiar.json de cada hogar)")
+    periodo = parser.add_mutually_exclusive_group()
+    periodo.add_argument("--mes", help="mes AAAA-MM (por omisión, el libro completo)")
+    periodo.add_argument("--anio", help="año AAAA: un reporte por mes más los totales")
+    parser.add_argument("--presupuesto", default="presupuesto_mensual.json",
+                        help="archivo de presupuesto, junto a cada libro")
+    parser.add_argument("--modo", default="diario", choices=["diario", "json", "sqlite", "particionado"],
+                        help="modo de almacenamiento de los libros (se leen sin modificarlos)")
+    parser.add_argument("--hoy", default=pd.Timestamp.today().strftime("%Y-%m-%d"),
+                        help="fecha para la proyección del mes en curso")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count(), help="procesos en paralelo")
+    parser.add_argument("--salida", help="directorio donde escribir un JSON por libro (por omisión, JSON lines a la salida estándar)")
+    args = parser.parse_args(argumentos)
+
+    tareas = [
+        {"libro": libro, "presupuesto": args.presupuesto, "modo": args.modo,
+         "mes": args.mes, "anio": args.anio, "hoy": args.hoy}
+        for libro in args.libros
+    ]
+    if args.procesos > 1 and len(tareas) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.procesos, len(tareas))) as pool:
+            resultados = pool.map(generar, tareas)
+            errores = _escribir(resultados, args)
+    else:
+        errores = _escribir(map(generar, tareas), args)
+    return 1 if errores else 0
+
+
+def _escribir(resultados, args):
+    """Escribe cada resultado apenas llega; devuelve cuántos libros fallaron"""
+    errores = 0
+    if args.salida:
+        os.makedirs(args.salida, exist_ok=True)
+    for resultado in resultados:
+        if "error" in resultado:
+            errores += 1
+            print(f"❌ {resultado['libro']}: {resultado['error']}", file=sys.stderr)
+            continue
+        if args.salida:
+            ruta = os.path.join(args.salida, _nombre_salida(resultado["libro"], args.anio or args.mes or "completo"))
+            with open(ruta, "w") as f:
+                json.dump(resultado, f, indent=2, ensure_ascii=False)
+            print(f"✅ {resultado['libro']} -> {ruta}", file=sys.stderr)
+        else:
+            print(json.dumps(resultado, ensure_ascii=False))
+    return errores
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+# archivo: resumenes.py
+import pandas as pd
+
+from instrumentacion import tramo
+from libro import a_centavos, a_monto
+
+# Dimensiones de un gasto dentro del mes
+DIMENSIONES_GASTO = ["categoria", "subcategoria", "medio_pago"]
+
+
+def _vacio():
+    return {"ingresos": [0, 0], "gastos": {}}
+
+
+class IndiceResumen:
+    """
+    Totales materializados por mes × categoría × subcategoría × medio de pago,
+    en centavos enteros para que las sumas sean exactas. Cada operación del
+    libro lo actualiza con un delta, así las métricas del dashboard son
+    búsquedas que no dependen del tamaño del historial.
+    """
+
+    def __init__(self):
+        # mes -> {"ingresos": [centavos, cantidad], "gastos": {(cat, sub, medio): [centavos, cantidad]}}
+        self.meses = {}
+
+    @classmethod
+    def desde_datos(cls, data):
+        indice = cls()
+        with tramo("resumen: construir índice"):
+            for tipo in ("ingresos", "gastos"):
+                for registro in data.get(tipo, []):
+                    indice._sumar(tipo, registro, 1)
+        return indice
+
+    def copia(self):
+        indice = IndiceResumen()
+        indice.meses = {
+            mes: {"ingresos": list(r["ingresos"]), "gastos": {k: list(v) for k, v in r["gastos"].items()}}
+            for mes, r in self.meses.items()
+        }
+        return indice
+
+    # ======= Actualización incremental =======
+    def _sumar(self, tipo, registro, signo):
+        mes = registro["fecha"][:7]
+        resumen = self.meses.setdefault(mes, _vacio())
+        if tipo == "ingresos":
+            acumulado = resumen["ingresos"]
+        else:
+            clave = tuple(registro.get(d) for d in DIMENSIONES_GASTO)
+            acumulado = resumen["gastos"].setdefault(clave, [0, 0])
+        acumulado[0] += signo * a_centavos(registro["monto"])
+        acumulado[1] += signo
+        if acumulado[1] == 0:
+            if tipo == "gastos":
+                del resumen["gastos"][clave]
+            else:
+                resumen["ingresos"] = [0, 0]
+            if resumen["ingresos"][1] == 0 and not resumen["gastos"]:
+                del self.meses[mes]
+
+    def aplicar(self, operacion):
+        """Aplica el delta de una operación del libro (ver almacenamiento.aplicar_operacion)"""
+        op, tipo = operacion["op"], operacion.get("tipo")
+        if op == "agregar":
+            self._sumar(tipo, operacion["registro"], 1)
+        elif op == "agregar_lote":
+            for tipo_lote, registros in operacion["registros"].items():
+                for registro in registros:
+                    self._sumar(tipo_lote, registro, 1)
+        elif op == "actualizar":
+            if "anterior" not in operacion:
+                raise ValueError("La operación no incluye el registro anterior")
+            self._sumar(tipo, operacion["anterior"], -1)
+            self._sumar(tipo, operacion["registro"], 1)
+        elif op == "eliminar":
+            if "anteriores" not in operacion:
+                raise ValueError("La operación no incluye los registros eliminados")
+            for registro in operacion["anteriores"]:
+                self._sumar(tipo, registro, -1)
+        elif op == "eliminar_mes":
+            resumen = self.meses.get(operacion["mes"])
+            if resumen is not None:
+                for t in operacion["tipos"]:
+                    resumen[t] = [0, 0] if t == "ingresos" else {}
+                if resumen["ingresos"][1] == 0 and not resumen["gastos"]:
+                    del self.meses[operacion["mes"]]
+        else:
+            raise ValueError(f"Operación desconocida: {op}")
+
+    # ======= Consultas =======
+    def _resumenes(self, mes):
+        if mes is None:
+            return list(self.meses.values())
+        return [self.meses[mes]] if mes in self.meses else []
+
+    def meses_disponibles(self):
+        return sorted(self.meses)
+
+    def contar(self, tipo, mes=None):
+        if tipo == "ingresos":
+            return sum(r["ingresos"][1] for r in self._resumenes(mes))
+        return sum(v[1] for r in self._resumenes(mes) for v in r["gastos"].values())
+
+    def total_centavos(self, tipo, mes=None):
+        if tipo == "ingresos":
+            return sum(r["ingresos"][0] for r in self._resumenes(mes))
+        return sum(v[0] for r in self._resumenes(mes) for v in r["gastos"].values())
+
+    def total(self, tipo, mes=None):
+        return a_monto(self.total_centavos(tipo, mes))
+
+    def totales_por_mes(self):
+        """Centavos de ingresos y gastos de cada mes con movimientos, en orden"""
+        filas = [
+            (mes, r["ingresos"][0], sum(v[0] for v in r["gastos"].values()))
+            for mes, r in sorted(self.meses.items())
+        ]
+        return pd.DataFrame(filas, columns=["mes", "ingresos", "gastos"]).astype({"ingresos": "int64", "gastos": "int64"})
+
+    def gastos_por(self, columnas, mes=None):
+        """Suma de gastos agrupada por las columnas indicadas"""
+        filas = [
+            {"mes": m, **dict(zip(DIMENSIONES_GASTO, clave)), "centavos": valor[0]}
+            for m in ([mes] if mes is not None else list(self.meses))
+            for clave, valor in self.meses.get(m, _vacio())["gastos"].items()
+        ]
+        df = pd.DataFrame(filas, columns=["mes"] + DIMENSIONES_GASTO + ["centavos"]).astype({"centavos": "int64"})
+        agrupado = df.groupby(columnas, as_index=False)["centavos"].sum()
+        # La conversión a monto decimal ocurre después de sumar
+        agrupado["monto"] = agrupado.pop("centavos") / 100
+        return agrupado
+
+    # ======= Persistencia =======
+    def a_json(self, marca):
+        """Contenido para guardar junto al libro; `marca` indica hasta qué cambio lo refleja"""
+        return {
+            "marca": marca,
+            "unidad": "centavos",
+            "ingresos": [[mes, *r["ingresos"]] for mes, r in self.meses.items() if r["ingresos"][1]],
+            "gastos": [[mes, *clave, *valor] for mes, r in self.meses.items() for clave, valor in r["gastos"].items()],
+        }
+
+    @classmethod
+    def desde_json(cls, contenido):
+        if contenido.get("unidad") != "centavos":
+            raise ValueError("Índice guardado con montos decimales: se reconstruye")
+        indice = cls()
+        for mes, centavos, cantidad in contenido["ingresos"]:
+            indice.meses.setdefault(mes, _vacio())["ingresos"] = [centavos, cantidad]
+        for mes, categoria, subcategoria, medio_pago, centavos, cantidad in contenido["gastos"]:
+            indice.meses.setdefault(mes, _vacio())["gastos"][(categoria, subcategoria, medio_pago)] = [centavos, cantidad]
+        return indice
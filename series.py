@@ -0,0 +1,78 @@
+# archivo: series.py
+import numpy as np
+import pandas as pd
+
+# Ventanas de media móvil que ofrece el dashboard, en meses
+VENTANAS_TENDENCIA = [1, 3, 6, 12]
+
+NOMBRES_MESES = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
+
+COLUMNAS_SERIE = ["ingresos", "gastos", "balance", "saldo", "tendencia_ingresos", "tendencia_gastos"]
+
+
+def rango_meses(desde, hasta):
+    """Meses "AAAA-MM" de `desde` a `hasta`, ambos incluidos"""
+    return pd.period_range(desde, hasta, freq="M").strftime("%Y-%m").tolist()
+
+
+# ======= Series mensuales =======
+# Todo sale de los totales por mes (ver totales_por_mes y gastos_por), no de los
+# registros: diez años son 120 filas, sin importar cuántos movimientos diarios haya.
+def serie_mensual(totales, ventana=3):
+    """
+    Serie continua (los meses sin movimientos valen 0) desde el primer mes con
+    datos hasta el último: ingresos, gastos y balance del mes, saldo acumulado y
+    medias móviles de `ventana` meses. Las sumas se hacen en centavos enteros.
+    """
+    if totales.empty:
+        return pd.DataFrame(columns=COLUMNAS_SERIE, index=pd.Index([], name="mes"), dtype=float)
+    centavos = totales.set_index("mes")[["ingresos", "gastos"]]
+    centavos = centavos.reindex(rango_meses(centavos.index.min(), centavos.index.max()), fill_value=0)
+    balance = centavos["ingresos"] - centavos["gastos"]
+    moviles = centavos.rolling(ventana, min_periods=1).mean()
+    serie = pd.DataFrame({
+        "ingresos": centavos["ingresos"] / 100,
+        "gastos": centavos["gastos"] / 100,
+        "balance": balance / 100,
+        # Se acumula desde el primer mes: el saldo de un rango incluye lo anterior a él
+        "saldo": balance.cumsum() / 100,
+        "tendencia_ingresos": moviles["ingresos"] / 100,
+        "tendencia_gastos": moviles["gastos"] / 100,
+    })
+    serie.index.name = "mes"
+    return serie
+
+
+def tendencias_categorias(gastos_mes_categoria, meses, ventana=3):
+    """
+    Media móvil de gastos por categoría (una columna por categoría) en los `meses`
+    pedidos; `gastos_mes_categoria` es gastos_por(["mes", "categoria"]). La media
+    se calcula sobre la serie completa, así el inicio del rango usa los meses previos.
+    """
+    tabla = gastos_mes_categoria.pivot_table(
+        index="mes", columns="categoria", values="monto", aggfunc="sum", fill_value=0.0
+    )
+    if tabla.empty:
+        return pd.DataFrame(index=pd.Index(meses, name="mes"))
+    completo = rango_meses(min(tabla.index.min(), meses[0]), max(tabla.index.max(), meses[-1]))
+    tabla = tabla.reindex(completo, fill_value=0.0).rolling(ventana, min_periods=1).mean()
+    tabla.columns.name = None
+    tabla.index.name = "mes"
+    return tabla.loc[meses]
+
+
+def comparacion_anual(serie, columna="gastos"):
+    """
+    Tabla año × mes (Ene..Dic) de una columna de la serie y la variación porcentual
+    contra el mismo mes del año anterior (NaN donde no hay con qué comparar).
+    """
+    periodos = pd.PeriodIndex(serie.index, freq="M")
+    tabla = pd.DataFrame(
+        {"anio": periodos.year, "mes": periodos.month, "valor": serie[columna].to_numpy()}
+    ).pivot(index="anio", columns="mes", values="valor").reindex(columns=range(1, 13))
+    # La serie es continua, así que los años son consecutivos: la fila anterior es el año anterior
+    anterior = tabla.shift(1)
+    variacion = ((tabla - anterior) / anterior.abs() * 100).replace([np.inf, -np.inf], np.nan)
+    tabla.columns = variacion.columns = NOMBRES_MESES
+    tabla.index.name = variacion.index.name = "Año"
+    return tabla, variacion
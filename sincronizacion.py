@@ -0,0 +1,222 @@
+# archivo: sincronizacion.py
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from almacenamiento import AlmacenamientoDiario, escritura
+from libro import nuevo_id
+
+# Cambios enviados por transacción al servidor
+TAMANO_LOTE_SINCRONIZACION = 500
+# Segundos que se espera después de un cambio para juntar los siguientes en el mismo lote
+ESPERA_AGRUPACION = 0.5
+# Reintentos con espera exponencial: de 1 segundo hasta 1 minuto
+ESPERA_REINTENTO_INICIAL = 1.0
+ESPERA_REINTENTO_MAXIMA = 60.0
+
+ESQUEMA_COLA = """
+CREATE TABLE IF NOT EXISTS cola (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    clave TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    contenido TEXT NOT NULL
+);
+"""
+
+
+# ======= Cola local durable =======
+class ColaSincronizacion:
+    """
+    Cambios pendientes de enviar al servidor, en una base SQLite local: cada
+    cambio queda confirmado en disco al encolarlo y se borra solo cuando el
+    servidor lo recibió. Cada uno lleva una clave de idempotencia.
+    """
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.nueva = not os.path.exists(archivo)
+        self._conexion = sqlite3.connect(archivo, check_same_thread=False)
+        self._bloqueo = threading.Lock()
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.executescript(ESQUEMA_COLA)
+
+    def encolar(self, tipo, contenido):
+        clave = nuevo_id()
+        with self._bloqueo, self._conexion:
+            self._conexion.execute(
+                "INSERT INTO cola (clave, tipo, contenido) VALUES (?, ?, ?)", (clave, tipo, json.dumps(contenido))
+            )
+        return clave
+
+    def pendientes(self, limite=TAMANO_LOTE_SINCRONIZACION):
+        """Los cambios más antiguos, en orden: (seq, clave, tipo, contenido)"""
+        with self._bloqueo:
+            filas = self._conexion.execute(
+                "SELECT seq, clave, tipo, contenido FROM cola ORDER BY seq LIMIT ?", (limite,)
+            ).fetchall()
+        return [(seq, clave, tipo, json.loads(contenido)) for seq, clave, tipo, contenido in filas]
+
+    def confirmar(self, hasta_seq):
+        with self._bloqueo, self._conexion:
+            self._conexion.execute("DELETE FROM cola WHERE seq <= ?", (hasta_seq,))
+
+    def contar(self):
+        with self._bloqueo:
+            return self._conexion.execute("SELECT COUNT(*) FROM cola").fetchone()[0]
+
+    def cerrar(self):
+        with self._bloqueo:
+            self._conexion.close()
+
+
+def agrupar_cambios(cambios):
+    """
+    Junta los cambios de un lote antes de enviarlos: una escritura completa deja
+    sin efecto los cambios del mismo tipo anteriores a ella, y las altas seguidas
+    viajan como un solo agregar_lote. Devuelve (claves, tipo, contenido); las
+    claves de los cambios absorbidos van con el cambio que los reemplaza.
+    """
+    ultimo_datos = max((i for i, c in enumerate(cambios) if c[2] == "datos"), default=-1)
+    ultimo_presupuesto = max((i for i, c in enumerate(cambios) if c[2] == "presupuesto"), default=-1)
+    agrupados, absorbidas = [], {"datos": [], "presupuesto": []}
+    for i, (_, clave, tipo, contenido) in enumerate(cambios):
+        if (tipo in ("operacion", "datos") and i < ultimo_datos) or (tipo == "presupuesto" and i < ultimo_presupuesto):
+            absorbidas["presupuesto" if tipo == "presupuesto" else "datos"].append(clave)
+            continue
+        if tipo in absorbidas:
+            agrupados.append((absorbidas[tipo] + [clave], tipo, contenido))
+            continue
+        if contenido["op"] in ("agregar", "agregar_lote"):
+            registros = (
+                {contenido["tipo"]: [contenido["registro"]]} if contenido["op"] == "agregar" else contenido["registros"]
+            )
+            anterior = agrupados[-1] if agrupados else None
+            if anterior is not None and anterior[1] == "operacion" and anterior[2]["op"] == "agregar_lote":
+                anterior[0].append(clave)
+                for tipo_lote, lista in registros.items():
+                    anterior[2]["registros"].setdefault(tipo_lote, []).extend(lista)
+                continue
+            contenido = {"op": "agregar_lote", "registros": {t: list(r) for t, r in registros.items()}}
+        agrupados.append(([clave], tipo, contenido))
+    return agrupados
+
+
+# ======= Almacenamiento local con sincronización en segundo plano =======
+class AlmacenamientoSincronizado(AlmacenamientoDiario):
+    """
+    Lee y escribe en el almacenamiento con diario local, así la interfaz nunca
+    espera a la red. Cada cambio se encola además en una cola durable y un hilo
+    lo envía al servidor (AlmacenamientoSQL) en lotes agrupados, con reintentos.
+    La primera vez se encola el libro y el presupuesto locales completos: el
+    almacenamiento local es la fuente de verdad y el servidor, su réplica.
+
+    El cambio local y su entrada en la cola son dos escrituras durables
+    separadas: si el proceso cae entre una y otra, el cambio queda en el diario
+    local pero no llega al servidor hasta la próxima escritura completa de lo
+    mismo (guardar_datos para el libro, guardar_presupuesto para el presupuesto).
+    """
+
+    def __init__(self, data_file, budget_file, crear_remoto, cola_file=None):
+        super().__init__(data_file, budget_file)
+        if cola_file is None:
+            cola_file = f"{os.path.splitext(data_file)[0]}.cola.db"
+        self.cola = ColaSincronizacion(cola_file)
+        self._crear_remoto = crear_remoto
+        self._remoto = None
+        self.ultimo_error = None
+        self.ultima_sincronizacion = None
+        self._aviso = threading.Event()
+        self._detener = threading.Event()
+        self._bloqueo_envio = threading.Lock()
+        if self.cola.nueva:
+            self.cola.encolar("datos", self.cargar_datos())
+            self.cola.encolar("presupuesto", self.cargar_presupuesto())
+        # Lo que quedó pendiente de una ejecución anterior se envía al arrancar
+        self._aviso.set()
+        self._hilo = threading.Thread(target=self._sincronizar_siempre, daemon=True)
+        self._hilo.start()
+
+    # ======= Escritura local + cola =======
+    def _encolar(self, tipo, contenido):
+        self.cola.encolar(tipo, contenido)
+        self._aviso.set()
+
+    @escritura
+    def guardar_datos(self, data):
+        super().guardar_datos(data)
+        self._encolar("datos", data)
+
+    @escritura
+    def registrar(self, operacion, data=None):
+        super().registrar(operacion, data)
+        self._encolar("operacion", operacion)
+
+    @escritura
+    def guardar_presupuesto(self, presupuesto):
+        super().guardar_presupuesto(presupuesto)
+        self._encolar("presupuesto", presupuesto)
+
+    # ======= Envío al servidor =======
+    def sincronizar(self):
+        """Envía un lote de la cola; devuelve cuántos cambios confirmó el servidor"""
+        with self._bloqueo_envio:
+            cambios = self.cola.pendientes()
+            if not cambios:
+                return 0
+            if self._remoto is None:
+                # Conectar también puede fallar o tardar: ocurre aquí, fuera de la interfaz
+                self._remoto = self._crear_remoto()
+            # Un envío anterior pudo llegar sin que se confirmara en la cola: no se repite
+            recibidas = self._remoto.claves_recibidas([c[1] for c in cambios])
+            nuevos = [c for c in cambios if c[1] not in recibidas]
+            if nuevos:
+                self._remoto.aplicar_sincronizacion(agrupar_cambios(nuevos))
+            self.cola.confirmar(cambios[-1][0])
+            return len(cambios)
+
+    def _sincronizar_siempre(self):
+        try:
+            self._enviar_hasta_detener()
+        finally:
+            # Nadie más usa la cola ni el servidor cuando el hilo termina: se cierran sus conexiones
+            self.cola.cerrar()
+            if self._remoto is not None:
+                self._remoto.cerrar()
+
+    def _enviar_hasta_detener(self):
+        espera = ESPERA_REINTENTO_INICIAL
+        while not self._detener.is_set():
+            self._aviso.wait()
+            self._detener.wait(ESPERA_AGRUPACION)
+            self._aviso.clear()
+            try:
+                while self.sincronizar():
+                    pass
+                self.ultimo_error = None
+                self.ultima_sincronizacion = time.time()
+                espera = ESPERA_REINTENTO_INICIAL
+            except Exception as e:
+                self.ultimo_error = str(e)
+                self._detener.wait(espera)
+                espera = min(espera * 2, ESPERA_REINTENTO_MAXIMA)
+                self._aviso.set()
+
+    def cerrar(self, esperar=False):
+        """
+        Detiene el hilo tras un último envío y cierra la cola. Lo que no llegue al
+        servidor sigue en la cola durable y lo envía la próxima instancia del mismo
+        hogar. Con `esperar`, vuelve cuando el hilo terminó.
+        """
+        self._detener.set()
+        self._aviso.set()
+        if esperar:
+            self._hilo.join()
+
+    def estado_sincronizacion(self):
+        return {
+            "pendientes": self.cola.contar(),
+            "error": self.ultimo_error,
+            "ultima": self.ultima_sincronizacion,
+        }
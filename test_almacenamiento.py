@@ -0,0 +1,82 @@
+# archivo: test_almacenamiento.py
+import pytest
+
+from almacenamiento import crear_almacenamiento
+from almacenamiento_sql import crear_motor
+
+MODOS = ["json", "diario", "sqlite", "particionado", "sql"]
+
+
+def _gasto(descripcion, monto, fecha):
+    return {
+        "monto": monto,
+        "descripcion": descripcion,
+        "categoria": "Alimentación",
+        "subcategoria": "Supermercado",
+        "medio_pago": "Efectivo",
+        "fecha": fecha,
+    }
+
+
+def _abrir(modo, motor=None):
+    return crear_almacenamiento(modo, "libro.json", "presupuesto.json", motor=motor)
+
+
+@pytest.fixture
+def abrir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    motor = crear_motor("sqlite:///base.db")
+    return lambda modo: _abrir(modo, motor if modo == "sql" else None)
+
+
+def _totales(almacen):
+    consultas = almacen.consultas()
+    return {mes: (consultas.contar("gastos", mes), consultas.total_centavos("gastos", mes))
+            for mes in consultas.meses_disponibles()}
+
+
+@pytest.mark.parametrize("modo", MODOS)
+def test_anteriores_salen_de_lo_guardado(abrir, modo):
+    almacen = abrir(modo)
+    for descripcion, monto, fecha in [("Feria", 10.0, "2025-08-20"), ("Pan", 3.5, "2025-09-02")]:
+        almacen.registrar({"op": "agregar", "tipo": "gastos", "registro": _gasto(descripcion, monto, fecha)})
+    feria, pan = almacen.cargar_datos()["gastos"]
+    # Otra sesión cambia el registro después de que esta lo leyó
+    almacen.registrar({"op": "actualizar", "tipo": "gastos", "id": feria["id"],
+                       "registro": {**feria, "monto": 25.0, "fecha": "2025-09-10"}})
+    operacion = {"op": "actualizar", "tipo": "gastos", "id": feria["id"],
+                 "registro": {**feria, "monto": 12.0}, "anterior": feria}
+    almacen.registrar(operacion)
+    assert operacion["anterior"]["monto"] == 25.0
+    operacion = {"op": "eliminar", "tipo": "gastos", "ids": [pan["id"]], "anteriores": [{**pan, "monto": 99.0}]}
+    almacen.registrar(operacion)
+    assert [r["monto"] for r in operacion["anteriores"]] == [3.5]
+    esperado = {"2025-08": (1, 1200)}
+    assert _totales(almacen) == esperado
+    # El índice guardado coincide también al abrir de nuevo
+    assert _totales(abrir(modo)) == esperado
+
+
+@pytest.mark.parametrize("modo", MODOS)
+def test_registro_borrado_por_otra_sesion(abrir, modo):
+    almacen = abrir(modo)
+    almacen.registrar({"op": "agregar", "tipo": "gastos", "registro": _gasto("Feria", 10.0, "2025-08-20")})
+    feria = almacen.cargar_datos()["gastos"][0]
+    almacen.registrar({"op": "eliminar", "tipo": "gastos", "ids": [feria["id"]]})
+    with pytest.raises(KeyError):
+        almacen.registrar({"op": "actualizar", "tipo": "gastos", "id": feria["id"], "registro": feria})
+    with pytest.raises(KeyError):
+        almacen.registrar({"op": "eliminar", "tipo": "gastos", "ids": [feria["id"]]})
+    assert almacen.cargar_datos()["gastos"] == []
+
+
+@pytest.mark.parametrize("modo", ["sqlite", "particionado", "sql"])
+def test_migracion_no_modifica_el_origen(abrir, tmp_path, modo):
+    # Libro anterior a los ids: un objeto por registro
+    libro = tmp_path / "libro.json"
+    libro.write_text('{"ingresos": [{"monto": 900.0, "descripcion": "Sueldo", "fecha": "2025-09-01"}], "gastos": []}')
+    original = libro.read_bytes()
+    almacen = abrir(modo)
+    assert [r["descripcion"] for r in almacen.cargar_datos()["ingresos"]] == ["Sueldo"]
+    assert almacen.cargar_datos()["ingresos"][0]["id"]
+    assert libro.read_bytes() == original
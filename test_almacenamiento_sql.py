@@ -0,0 +1,71 @@
+# archivo: test_almacenamiento_sql.py
+import pytest
+
+from almacenamiento import ConflictoEscritura, crear_almacenamiento
+from almacenamiento_sql import crear_motor
+
+
+def _gasto(descripcion, monto=10.0, fecha="2025-09-15"):
+    return {
+        "monto": monto,
+        "descripcion": descripcion,
+        "categoria": "Alimentación",
+        "subcategoria": "Supermercado",
+        "medio_pago": "Efectivo",
+        "fecha": fecha,
+    }
+
+
+@pytest.fixture(autouse=True)
+def directorio(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _ida_y_vuelta(almacen):
+    almacen.registrar({"op": "agregar", "tipo": "gastos", "registro": _gasto("Feria")})
+    almacen.registrar({"op": "agregar", "tipo": "gastos", "registro": _gasto("Pan", 3.5)})
+    gastos = almacen.cargar_datos()["gastos"]
+    assert [g["descripcion"] for g in gastos] == ["Feria", "Pan"]
+    almacen.registrar({"op": "eliminar", "tipo": "gastos", "ids": [gastos[0]["id"]]})
+    assert [(g["descripcion"], g["monto"]) for g in almacen.cargar_datos()["gastos"]] == [("Pan", 3.5)]
+
+
+def _conflicto(almacen):
+    version = almacen.version_datos
+    base = almacen.cargar_datos()
+    pan = base["gastos"][0]
+    # Otra sesión edita el mismo registro después de la lectura
+    almacen.registrar({"op": "actualizar", "tipo": "gastos", "id": pan["id"], "registro": {**pan, "monto": 4.0}})
+    propio = {"ingresos": [], "gastos": [{**pan, "monto": 5.0}]}
+    with pytest.raises(ConflictoEscritura):
+        almacen.guardar_datos_con_version(propio, version)
+    with pytest.raises(ConflictoEscritura):
+        almacen.guardar_datos_con_version(propio, version, base=base)
+    # Sin cambios cruzados, la fusión conserva lo de ambas sesiones
+    version, base = almacen.version_datos, almacen.cargar_datos()
+    almacen.registrar({"op": "agregar", "tipo": "gastos", "registro": _gasto("Leche", 2.0)})
+    propio = {"ingresos": [], "gastos": base["gastos"] + [_gasto("Huevos", 6.0)]}
+    almacen.guardar_datos_con_version(propio, version, base=base)
+    assert sorted(g["descripcion"] for g in almacen.cargar_datos()["gastos"]) == ["Huevos", "Leche", "Pan"]
+
+
+@pytest.mark.parametrize("esquema", [None, "hogar_a"])
+def test_sql_en_memoria(esquema):
+    almacen = crear_almacenamiento("sql", "libro.json", "presupuesto.json", motor=crear_motor("sqlite://"), esquema=esquema)
+    _ida_y_vuelta(almacen)
+    _conflicto(almacen)
+
+
+def test_cerrar_solo_engine_propio():
+    compartido = crear_motor("sqlite:///base.db")
+    propios = [
+        crear_almacenamiento("sql", "libro.json", "presupuesto.json", url="sqlite:///propia.db"),
+        crear_almacenamiento("sql", "libro.json", "presupuesto.json", motor=compartido, esquema="hogar_a"),
+    ]
+    ajeno = crear_almacenamiento("sql", "libro.json", "presupuesto.json", motor=compartido)
+    for almacen in propios + [ajeno]:
+        almacen.cargar_datos()
+        almacen.cerrar()
+    assert [almacen.motor.pool.checkedin() for almacen in propios] == [0, 0]
+    assert compartido.pool.checkedin() == 1
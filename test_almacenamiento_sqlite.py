@@ -0,0 +1,69 @@
+# archivo: test_almacenamiento_sqlite.py
+import os
+import stat
+import threading
+
+from almacenamiento import escribir_json_atomico
+from almacenamiento_sqlite import AlmacenamientoSQLite
+
+
+def _libro(cantidad):
+    def gasto(i):
+        return {"id": f"g{cantidad}-{i}", "monto": 1.0, "descripcion": "Pan", "categoria": "Alimentación",
+                "subcategoria": "Supermercado", "medio_pago": "Efectivo", "fecha": "2025-09-15"}
+    ingresos = [{"id": f"i{cantidad}-{i}", "monto": 1.0, "descripcion": "Venta", "fecha": "2025-09-15"}
+                for i in range(cantidad)]
+    return {"ingresos": ingresos, "gastos": [gasto(i) for i in range(cantidad)]}
+
+
+def test_lecturas_ven_commits_completos(tmp_path):
+    almacen = AlmacenamientoSQLite(str(tmp_path / "libro.json"), str(tmp_path / "presupuesto.json"))
+    detener = threading.Event()
+    rotas = []
+
+    def escribir():
+        cantidad = 1
+        while not detener.is_set():
+            # Cada escritura reemplaza ambos tipos en una sola transacción
+            almacen.guardar_datos(_libro(cantidad % 40 + 1))
+            cantidad += 1
+
+    def leer():
+        for _ in range(100):
+            data = almacen.cargar_datos()
+            if len(data["ingresos"]) != len(data["gastos"]):
+                rotas.append(data)
+            almacen.consultas().contar("gastos")
+
+    escritor = threading.Thread(target=escribir)
+    escritor.start()
+    lectores = [threading.Thread(target=leer) for _ in range(8)]
+    for lector in lectores:
+        lector.start()
+    for lector in lectores:
+        lector.join()
+    detener.set()
+    escritor.join()
+    assert rotas == []
+
+
+def test_lecturas_no_dejan_conexiones_abiertas(tmp_path):
+    almacen = AlmacenamientoSQLite(str(tmp_path / "libro.json"), str(tmp_path / "presupuesto.json"))
+    almacen.guardar_datos(_libro(3))
+    # SQLite reutiliza los descriptores que cierra mientras otra conexión tiene el archivo abierto
+    almacen.consultas().registros("gastos")
+    abiertas = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+    hilos = [threading.Thread(target=lambda: almacen.consultas().registros("gastos")) for _ in range(20)]
+    for hilo in hilos:
+        hilo.start()
+        hilo.join()
+    if abiertas is not None:
+        assert len(os.listdir("/proc/self/fd")) <= abiertas
+
+
+def test_escritura_atomica_conserva_permisos(tmp_path):
+    ruta = tmp_path / "presupuesto.json"
+    escribir_json_atomico(str(ruta), {"2025-09": {}})
+    os.chmod(ruta, 0o640)
+    escribir_json_atomico(str(ruta), {"2025-10": {}})
+    assert stat.S_IMODE(os.stat(ruta).st_mode) == 0o640
@@ -0,0 +1,27 @@
+# archivo: test_clasificador.py
+import pandas as pd
+import pytest
+
+from clasificador import ClasificadorGastos
+from libro import tipar_registros
+
+
+def _gasto(id_registro, medio_pago):
+    return {"id": id_registro, "monto": 5.0, "descripcion": "Pan de la esquina", "categoria": "Alimentación",
+            "subcategoria": "Tienda Barrio", "medio_pago": medio_pago, "fecha": "2025-09-15"}
+
+
+@pytest.mark.parametrize("tipar", [True, False])
+def test_entrenamiento_y_operaciones_cuentan_igual(tipar):
+    gastos = [_gasto("a", "Efectivo"), _gasto("b", None)]
+    # Sin tipar, las columnas son object: astype(str) convertiría None en "None"
+    df = tipar_registros(pd.DataFrame(gastos), "gastos") if tipar else pd.DataFrame(gastos)
+    entrenado = ClasificadorGastos.desde_registros(df)
+    incremental = ClasificadorGastos()
+    for gasto in gastos:
+        incremental.aplicar({"op": "agregar", "tipo": "gastos", "registro": gasto})
+    assert entrenado.exactas == incremental.exactas
+    assert entrenado.palabras == incremental.palabras
+    # Borrar el gasto sin medio de pago no deja votos huérfanos
+    entrenado.aplicar({"op": "eliminar", "tipo": "gastos", "ids": ["a", "b"], "anteriores": gastos})
+    assert entrenado.exactas == {} and entrenado.palabras == {}
@@ -0,0 +1,74 @@
+# archivo: test_hogares.py
+import gc
+
+import pytest
+
+from almacenamiento import crear_almacenamiento
+from almacenamiento_sql import crear_motor
+from hogares import CacheLRU, esquema_hogar, validar_hogar
+
+
+class Objeto:
+    def __init__(self):
+        self.cerrado = False
+
+    def cerrar(self):
+        self.cerrado = True
+
+
+def test_validar_hogar():
+    assert validar_hogar(" Casa-1 ") == "casa-1"
+    assert validar_hogar(None) == ""
+    with pytest.raises(ValueError):
+        validar_hogar("../etc")
+    assert esquema_hogar("casa-1") == "hogar_casa_1"
+
+
+def test_no_cierra_objetos_prestados():
+    cache = CacheLRU(2)
+    prestamos = [cache.adquirir(clave, Objeto) for clave in "abc"]
+    # Los tres están en uso: se supera el límite en lugar de cerrar uno
+    assert len(cache) == 3 and not any(p.objeto.cerrado for p in prestamos)
+    primero = prestamos[0].objeto
+    prestamos[0].liberar()
+    assert len(cache) == 2 and primero.cerrado
+    # Sin préstamos, la sesión recolectada libera el suyo
+    segundo = prestamos[1].objeto
+    del prestamos[1]
+    gc.collect()
+    assert len(cache) == 2 and not segundo.cerrado
+    otra = cache.adquirir("b", Objeto)
+    assert otra.objeto is segundo
+
+
+def test_creacion_fallida_no_deja_bloqueo():
+    cache = CacheLRU(2)
+    with pytest.raises(ZeroDivisionError):
+        cache.adquirir("a", lambda: 1 / 0)
+    assert cache._creando == {}
+    assert cache.adquirir("a", Objeto).objeto is not None
+
+
+def test_hogares_sql_separados(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    motor = crear_motor("sqlite:///base.db")
+    a = crear_almacenamiento("sql", "libro.json", "presupuesto.json", motor=motor, esquema="hogar_a")
+    b = crear_almacenamiento("sql", "libro.json", "presupuesto.json", motor=motor, esquema="hogar_b")
+    a.registrar({"op": "agregar", "tipo": "gastos", "registro": {
+        "monto": 10.0, "descripcion": "Feria", "categoria": "Alimentación", "subcategoria": "Supermercado",
+        "medio_pago": "Efectivo", "fecha": "2025-09-15",
+    }})
+    assert len(a.cargar_datos()["gastos"]) == 1
+    assert b.cargar_datos()["gastos"] == []
+    assert {p.name for p in tmp_path.glob("hogar_*.db")} == {"hogar_a.db", "hogar_b.db"}
+
+
+def test_bloqueo_por_directorio_de_particiones(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for hogar in ("a", "b"):
+        (tmp_path / hogar).mkdir()
+    a = crear_almacenamiento("particionado", "a/libro.json", "a/presupuesto.json")
+    otra_sesion = crear_almacenamiento("particionado", "a/libro.json", "a/presupuesto.json")
+    b = crear_almacenamiento("particionado", "b/libro.json", "b/presupuesto.json")
+    assert a._bloqueo is otra_sesion._bloqueo
+    assert a._bloqueo is not b._bloqueo
@@ -0,0 +1,25 @@
+# archivo: test_importacion.py
+import io
+
+import pytest
+
+from almacenamiento import ConsultasMemoria
+from importacion import ImportacionExtracto, leer_extracto
+
+
+def _importacion():
+    consultas = ConsultasMemoria(lambda: {"ingresos": [], "gastos": []})
+    return ImportacionExtracto(consultas, "Alimentación", "Supermercado", "Transferencia", True)
+
+
+def test_csv_con_punto_y_coma():
+    archivo = io.BytesIO("fecha;monto;descripcion\n01/09/2025;-10,50;Pan\n02/09/2025;900;Sueldo\n".encode())
+    importacion = _importacion().procesar(leer_extracto(archivo, "csv"))
+    assert [(g["descripcion"], g["monto"]) for g in importacion.nuevos["gastos"]] == [("Pan", 10.5)]
+    assert [(i["descripcion"], i["monto"]) for i in importacion.nuevos["ingresos"]] == [("Sueldo", 900.0)]
+
+
+def test_csv_sin_separador_reconocible():
+    # El Sniffer no encuentra separador: error de lectura legible, no csv.Error
+    with pytest.raises(ValueError):
+        _importacion().procesar(leer_extracto(io.BytesIO(b"abc\ndef\n"), "csv"))
@@ -0,0 +1,36 @@
+# archivo: test_pronostico.py
+import pandas as pd
+
+from almacenamiento import ConsultasMemoria
+from pronostico import meses_historia
+from reportes import proyectar_gastos
+
+
+def _libro(dias_por_mes):
+    gastos = [
+        {"id": f"{mes}-{dia}", "monto": 10.0, "descripcion": "Feria", "categoria": "Alimentación",
+         "subcategoria": "Supermercado", "medio_pago": "Efectivo", "fecha": f"{mes}-{dia:02d}"}
+        for mes, dias in dias_por_mes.items() for dia in range(1, dias + 1)
+    ]
+    return ConsultasMemoria(lambda: {"ingresos": [], "gastos": gastos})
+
+
+def test_meses_historia_solo_cubiertos():
+    assert meses_historia("2025-09", ["2025-07", "2025-08", "2025-09"]) == ["2025-07", "2025-08"]
+    assert len(meses_historia("2025-09")) == 12
+
+
+def test_proyeccion_con_poca_historia():
+    # Dos meses de historia a $10 diarios y el mes en curso al mismo ritmo
+    consultas = _libro({"2025-07": 30, "2025-08": 30, "2025-09": 14})
+    proyeccion = proyectar_gastos(consultas, "2025-09", {"Alimentación": 250.0}, pd.Timestamp("2025-09-14"))
+    fila = proyeccion.loc["Alimentación"]
+    assert fila["proyeccion"] > 280
+    assert fila["minimo"] > 250
+    assert fila["probabilidad_exceso"] == 1.0
+
+
+def test_proyeccion_sin_historia_extrapola():
+    consultas = _libro({"2025-09": 15})
+    proyeccion = proyectar_gastos(consultas, "2025-09", {"Alimentación": 400.0}, pd.Timestamp("2025-09-15"))
+    assert proyeccion.loc["Alimentación", "proyeccion"] == 300.0
@@ -0,0 +1,77 @@
+# archivo: test_sincronizacion.py
+import sqlite3
+
+import pytest
+
+import sincronizacion
+from almacenamiento import crear_almacenamiento
+from almacenamiento_sql import AlmacenamientoSQL, crear_motor
+from sincronizacion import AlmacenamientoSincronizado, agrupar_cambios
+
+
+def _gasto(descripcion, monto=10.0):
+    return {
+        "monto": monto,
+        "descripcion": descripcion,
+        "categoria": "Alimentación",
+        "subcategoria": "Supermercado",
+        "medio_pago": "Efectivo",
+        "fecha": "2025-09-15",
+    }
+
+
+@pytest.fixture(autouse=True)
+def directorio(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sincronizacion, "ESPERA_AGRUPACION", 0.01)
+    return tmp_path
+
+
+def test_sincroniza_al_servidor(directorio):
+    motor = crear_motor("sqlite:///base.db")
+    almacen = crear_almacenamiento("sincronizado", "libro.json", "presupuesto.json", motor=motor, esquema="hogar_a")
+    almacen.registrar({"op": "agregar", "tipo": "gastos", "registro": _gasto("Feria")})
+    almacen.registrar({"op": "agregar", "tipo": "gastos", "registro": _gasto("Pan", 3.5)})
+    feria = almacen.cargar_datos()["gastos"][0]
+    almacen.registrar({"op": "eliminar", "tipo": "gastos", "ids": [feria["id"]]})
+    almacen.guardar_presupuesto({"2025-09": {"Alimentación": 100.0}})
+    almacen.cerrar(esperar=True)
+    assert almacen.ultimo_error is None
+    # El último envío llegó al servidor y la conexión de la cola quedó cerrada
+    remoto = crear_almacenamiento("sql", "libro.json", "presupuesto.json", motor=motor, esquema="hogar_a")
+    assert remoto.cargar_datos() == almacen.cargar_datos()
+    assert remoto.cargar_presupuesto() == {"2025-09": {"Alimentación": 100.0}}
+    with pytest.raises(sqlite3.ProgrammingError):
+        almacen.cola.contar()
+    assert (directorio / "hogar_a.db").exists()
+
+
+def test_cola_conserva_cambios_sin_servidor():
+    def sin_red():
+        raise ConnectionError("sin red")
+
+    almacen = AlmacenamientoSincronizado("libro.json", "presupuesto.json", sin_red)
+    almacen.registrar({"op": "agregar", "tipo": "gastos", "registro": _gasto("Feria")})
+    with pytest.raises(ConnectionError):
+        almacen.sincronizar()
+    almacen.cerrar(esperar=True)
+    # La próxima instancia envía lo que quedó en la cola durable
+    motor = crear_motor("sqlite:///base.db")
+    almacen = AlmacenamientoSincronizado(
+        "libro.json", "presupuesto.json", lambda: AlmacenamientoSQL("libro.json", "presupuesto.json", motor=motor)
+    )
+    almacen.cerrar(esperar=True)
+    assert [g["descripcion"] for g in AlmacenamientoSQL("", "", motor=motor).cargar_datos()["gastos"]] == ["Feria"]
+
+
+def test_agrupar_cambios():
+    cambios = [
+        (1, "a", "operacion", {"op": "agregar", "tipo": "gastos", "registro": _gasto("Feria")}),
+        (2, "b", "operacion", {"op": "agregar", "tipo": "ingresos", "registro": {"monto": 5.0}}),
+        (3, "c", "presupuesto", {"2025-09": {}}),
+        (4, "d", "presupuesto", {"2025-10": {}}),
+    ]
+    agrupados = agrupar_cambios(cambios)
+    assert [(claves, tipo) for claves, tipo, _ in agrupados] == [(["a", "b"], "operacion"), (["c", "d"], "presupuesto")]
+    assert agrupados[0][2]["op"] == "agregar_lote"
+    assert agrupados[1][2] == {"2025-10": {}}